@@ -0,0 +1,258 @@
+"""
+Shared Datawrapper chart helpers
+================================
+
+Helpers used by the four Datawrapper chart scripts (`template-usage-summary.py`,
+`templategroups-usage_summary.py`, `template-explanation-table.py` and
+`template-pd-age-explanation-table.py`) to update, publish and inspect their charts.
+
+- Imports the `datawrapper` client only when a chart is updated (it is slow to import).
+- Loads the chart configuration JSON files (with `orjson` when installed).
+- Loads the Datawrapper API token from `.env` once per process (also when several chart scripts run together,
+  see `update-all-charts.py`).
+- Sends the Datawrapper API calls of each thread over its own HTTP session (kept-alive connections).
+- Uploads the chart data in the background while the chart metadata and description are updated.
+- Returns the published chart information, so the embed code can be read without fetching the chart again.
+
+License:
+--------
+This module is released into the public domain (CC0-style). Free to reuse, adapt, and distribute.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+# Use orjson for parsing the chart configs when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# The datawrapper client (which pulls in requests and IPython) is only imported when a chart is
+# actually updated, see init_datawrapper(); importing a chart script for its data functions stays cheap
+if TYPE_CHECKING:
+    from datawrapper import Datawrapper
+    from requests import Session
+
+# Connections kept open per HTTP session; each session is used by one thread, one call at a time
+SESSION_POOL_SIZE = 1
+
+
+class ThreadLocalSessions:
+    """
+    Stands in for the `requests` module in the datawrapper client, which only calls its
+    `get`/`post`/`put`/`patch`/`delete` functions. Each thread gets its own `requests.Session`,
+    since requests does not guarantee that a Session can be shared between threads.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = create_session()
+        return getattr(session, name)
+
+
+def create_session() -> Session:
+    """Create a `requests.Session` that keeps its connection to the Datawrapper API open."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=SESSION_POOL_SIZE, pool_maxsize=SESSION_POOL_SIZE)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+def load_chart_config(config_path: Path) -> dict:
+    """
+    Load the chart configuration (title, metadata blocks, description) from a JSON file.
+
+    Parameters:
+        config_path (Path): Path to the JSON config file of the chart.
+
+    Returns:
+        dict: The chart configuration.
+
+    Raises:
+        RuntimeError: If the file cannot be read or parsed.
+    """
+    try:
+        return json_loads(Path(config_path).read_bytes())
+    except Exception as e:
+        raise RuntimeError(f"Failed to load chart config from {config_path}: {e}")
+
+
+@lru_cache(maxsize=None)
+def load_api_token() -> str:
+    """Load the Datawrapper API token from .env (parsed once per process)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    token = os.getenv("DW_API_TOKEN")
+    if not token:
+        raise ValueError("DW_API_TOKEN not found in environment variables.")
+    return token
+
+
+def init_datawrapper(api_token: str) -> Datawrapper:
+    """
+    Initialize the Datawrapper API client.
+
+    The datawrapper client sends each API call through the module-level `requests` functions, which open
+    a new connection (and TLS handshake) per call. On first use, the client module's `requests` is replaced
+    (for the whole process) by `ThreadLocalSessions`, so the connection to the API is reused by all calls
+    made from the same thread, while concurrent threads (the data upload in `update_and_publish_chart`,
+    the charts in update-all-charts.py) never share a Session.
+
+    Parameters:
+        api_token (str): The Datawrapper API token.
+
+    Returns:
+        Datawrapper: The API client.
+    """
+    import requests
+    from datawrapper import Datawrapper  # https://datawrapper.readthedocs.io/en/latest/user-guide/api.html
+
+    client_module = sys.modules[Datawrapper.__module__]
+    if getattr(client_module, "r", None) is requests:
+        client_module.r = ThreadLocalSessions()
+
+    return Datawrapper(access_token=api_token)
+
+
+def update_and_publish_chart(
+    dw: Datawrapper,
+    chart_id: str,
+    data: pd.DataFrame,
+    config: dict,
+    default_title: str = "Untitled Datawrapper Chart"
+) -> dict:
+    """
+    Uploads data, updates metadata and description, and publishes a Datawrapper chart.
+
+    This function performs the following:
+    - Uploads a pandas DataFrame directly into the specified Datawrapper chart.
+    - Updates chart metadata using the provided configuration dictionary.
+    - Sets the textual description for the chart (intro, byline, source).
+    - Publishes the chart on Datawrapper.
+    - Prints a confirmation message upon success.
+
+    Parameters:
+        dw (Datawrapper): An instance of the Datawrapper API client.
+        chart_id (str): The ID of the chart to update.
+        data (pd.DataFrame): The data to upload into the chart.
+        config (dict): Chart configuration containing 'title', 'visualize', 'annotate', 'publish', and 'description' keys.
+        default_title (str): Title to use if the configuration has none.
+
+    Returns:
+        dict: The published chart information (including the embed codes), as returned by the publish call.
+
+    Raises:
+        RuntimeError: If any step of the chart update or publishing process fails.
+    """
+    try:
+        # Upload data in the background while the metadata and description are updated
+        # (separate API endpoints); publishing waits until both are done
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            upload = executor.submit(dw.add_data, chart_id=chart_id, data=data)
+
+            # Update chart metadata
+            title = config.get("title", default_title)
+            dw.update_chart(
+                chart_id=chart_id,
+                title=title,
+                metadata={
+                    "visualize": config.get("visualize", {}),
+                    "annotate": config.get("annotate", {}),
+                    "publish": config.get("publish", {})
+                }
+            )
+
+            # Update chart description
+            desc = config.get("description", {})
+            dw.update_description(
+                chart_id=chart_id,
+                intro=desc.get("intro", ""),
+                byline=desc.get("byline", ""),
+                source_name=desc.get("source-name", ""),
+                source_url=desc.get("source-url", ""),
+                aria_description=desc.get("aria-description", "")
+            )
+
+            # Wait for the data upload (re-raises any upload error)
+            upload.result()
+
+        # Publish chart
+        published = dw.publish_chart(chart_id=chart_id)
+        print(f"✅ Chart '{title}' updated and published successfully.")
+        return published.get("data", {})
+
+    except Exception as e:
+        raise RuntimeError(f"❌ Error while updating and publishing chart '{chart_id}': {e}")
+
+
+def get_chart_visualize_config(chart_metadata: dict, chart_id: str) -> dict:
+    """
+    Extract the 'visualize' configuration section from already fetched Datawrapper chart metadata.
+
+    Parameters:
+        chart_metadata (dict): The chart information as returned by `dw.get_chart()`.
+        chart_id (str): The ID of the chart (used in error messages).
+
+    Returns:
+        dict: The 'visualize' configuration section of the chart metadata.
+
+    Raises:
+        RuntimeError: If the 'visualize' section is missing.
+    """
+    visualize_config = chart_metadata.get("metadata", {}).get("visualize", {})
+
+    if not visualize_config:
+        raise RuntimeError(f"'visualize' section not found in chart metadata for chart ID '{chart_id}'.")
+
+    return visualize_config
+
+
+def get_responsive_embed_code(dw: Datawrapper, chart_id: str, chart_info: dict | None = None) -> str | None:
+    """
+    Fetch the responsive iframe embed code for a published Datawrapper chart.
+
+    Parameters:
+        dw (Datawrapper): An instance of the Datawrapper API client.
+        chart_id (str): The public or internal ID of the Datawrapper chart.
+        chart_info (dict | None): Chart information already at hand (e.g. as returned when publishing).
+            The chart is only fetched from the API if this does not contain the embed codes.
+
+    Returns:
+        str | None: The responsive embed code if available, or None if not found or an error occurred.
+    """
+    try:
+        embed_codes = (chart_info or {}).get("metadata", {}).get("publish", {}).get("embed-codes", {})
+        if not embed_codes:
+            chart_info = dw.get_chart(chart_id)
+            embed_codes = chart_info.get("metadata", {}).get("publish", {}).get("embed-codes", {})
+        script_embed = embed_codes.get("embed-method-web-component", None)
+
+        if script_embed:
+            return script_embed
+        else:
+            print("❌ Script embed code not found. Make sure the chart is published.")
+            return None
+
+    except Exception as e:
+        print(f"❌ Error retrieving embed code: {e}")
+        return None
@@ -0,0 +1,152 @@
+"""
+Shared data loading for the Datawrapper template table scripts
+===============================================================
+
+Helpers used by `template-explanation-table.py` and `template-pd-age-explanation-table.py`
+to read template metadata from the processed Excel file and to format template names as
+HTML links for Datawrapper tables. The Excel reader is also used by the usage summary scripts.
+
+- Reads only the requested columns, with the Rust-based calamine parser when `python-calamine`
+  is installed (falls back to `openpyxl`).
+- Caches the columns read from a sheet as a Parquet file next to the Excel file (when `pyarrow`
+  is installed), so re-runs skip Excel parsing until the Excel file changes.
+- Reads text columns as Arrow-backed strings when `pyarrow` is installed.
+- Builds the HTML links with vectorized string operations (no per-row Python calls).
+
+License:
+--------
+This module is released into the public domain (CC0-style). Free to reuse, adapt, and distribute.
+"""
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+# Use the Rust-based calamine parser for reading Excel files when python-calamine is installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+# Use Arrow-backed strings (vectorized string kernels) and the Parquet cache when pyarrow is installed
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+    PARQUET_CACHE = True
+except ImportError:
+    STRING_DTYPE = "string"
+    PARQUET_CACHE = False
+
+# Folder (next to the Excel file) holding the Parquet copies of previously read sheets
+CACHE_DIR_NAME = "parquet_cache"
+
+LINK_STYLE = 'style="color:#b1bfc3;" target="_blank" rel="nofollow noopener"'
+
+
+def read_excel_cached(
+    excel_path: str,
+    sheet_name: str,
+    columns: set,
+    string_columns: tuple = ()
+) -> pd.DataFrame:
+    """
+    Read the given columns of an Excel sheet, reusing a Parquet copy from an earlier run when possible.
+
+    The Parquet file is keyed by the sheet and the requested columns, and is only used while it is
+    newer than the Excel file. Without `pyarrow`, or if the cache cannot be written or read back,
+    the sheet is simply read from Excel.
+
+    Parameters:
+        excel_path (str): Path to the Excel file.
+        sheet_name (str): Name of the sheet to load.
+        columns (set): Columns to load; columns not present in the sheet are skipped.
+        string_columns (tuple): Columns to read directly as strings (no type inference).
+
+    Returns:
+        pd.DataFrame: The loaded columns.
+    """
+    excel_path = Path(excel_path)
+    cache_key = hashlib.sha1(repr((sorted(columns), sorted(string_columns), STRING_DTYPE)).encode()).hexdigest()[:10]
+    cache_path = excel_path.parent / CACHE_DIR_NAME / f"{excel_path.stem}.{sheet_name}.{cache_key}.parquet"
+
+    if PARQUET_CACHE and cache_path.exists() and cache_path.stat().st_mtime >= excel_path.stat().st_mtime:
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception as e:
+            print(f"⚠️ Could not read cached sheet '{sheet_name}', reading the Excel file instead: {e}")
+            cache_path.unlink(missing_ok=True)
+
+    df = pd.read_excel(
+        excel_path,
+        sheet_name=sheet_name,
+        engine=EXCEL_ENGINE,
+        usecols=lambda col: col in columns,
+        dtype={col: STRING_DTYPE for col in string_columns}
+    )
+
+    if PARQUET_CACHE:
+        # Write under a temporary name first, so an interrupted write never leaves a truncated cache file
+        partial_path = cache_path.with_name(cache_path.name + ".part")
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            df.to_parquet(partial_path, index=False)
+            partial_path.replace(cache_path)
+        except Exception as e:
+            print(f"⚠️ Could not cache sheet '{sheet_name}' as Parquet: {e}")
+            partial_path.unlink(missing_ok=True)
+
+    return df
+
+
+def read_template_sheet(
+    excel_path: str,
+    sheet_name: str,
+    required_columns: list,
+    optional_columns: tuple = (),
+    string_columns: tuple = ()
+) -> pd.DataFrame:
+    """
+    Load the required (and any present optional) columns of an Excel sheet.
+
+    Parameters:
+        excel_path (str): Path to the Excel file containing the template metadata.
+        sheet_name (str): Name of the sheet to load.
+        required_columns (list): Columns that must be present.
+        optional_columns (tuple): Columns that are loaded when present.
+        string_columns (tuple): Columns to read directly as strings (no type inference).
+
+    Returns:
+        pd.DataFrame: The loaded columns.
+
+    Raises:
+        ValueError: If required columns are missing from the sheet.
+    """
+    wanted_columns = set(required_columns) | set(optional_columns)
+    df = read_excel_cached(excel_path, sheet_name, wanted_columns, string_columns)
+
+    # Check for missing columns
+    missing_cols = [col for col in required_columns if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required column(s): {', '.join(missing_cols)}")
+
+    return df
+
+
+def format_template_links(templates: pd.Series, urls: pd.Series) -> pd.Series:
+    """
+    Format template names as HTML links to their template pages, for Datawrapper tables.
+
+    Templates without a (non-empty) URL are returned unchanged.
+
+    Parameters:
+        templates (pd.Series): Template names, e.g. '{{PD-old}}'.
+        urls (pd.Series): The matching template page URLs.
+
+    Returns:
+        pd.Series: '<a href="...">PD-old</a>' links, or the original template names.
+    """
+    has_url = urls.notna() & (urls != "")
+    template_links = '<a href="' + urls + '" ' + LINK_STYLE + '>' + templates.str.strip("{}") + '</a>'
+    return template_links.where(has_url, templates)
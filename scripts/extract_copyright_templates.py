@@ -17,7 +17,10 @@ dates, for review and documentation purposes.
 Key Features:
 -------------
 - Uses the MediaWiki API to search for Commons files in the desired category.
-- Fetches the raw wikitext of each file page.
+- Fetches the raw wikitext of the file pages in batches of 50, in the same API call as the search.
+- Fetches several batches concurrently over a shared, pooled HTTP session with retry/back-off.
+- Caches wikitexts on disk (SQLite, keyed by title + revision ID), so re-runs only download edited files.
+- Parses the wikitexts in parallel worker processes (one per CPU core).
 - Isolates wrapper templates like {{Information}}, {{Photograph}}, {{Artwork}}, and {{Book}}.
 - Extracts relevant templates from top-level usage or embedded fields like:
   - |permission=
@@ -31,6 +34,7 @@ Key Features:
 - Excludes known irrelevant templates via a robust filtering system.
 - Outputs results to:
   - Console (one line per file with all extracted info)
+  - CSV file (`*-Extracted_copyright_templates-<date>.csv`), streamed during the crawl, one row per file/template pair
   - Excel file (`*_commons_templates_output_<date>.xlsx`) with URLs and linked templates
 
 Output:
@@ -43,7 +47,10 @@ Output:
 Dependencies:
 -------------
 - Python 3.7+
-- `requests`, `re`, `pandas`, `openpyxl`
+- `requests`, `re`, `openpyxl`
+- Optional: `google-re2` (faster date parsing; falls back to `re`)
+- Optional: `orjson` (faster parsing of API responses; falls back to `json`)
+- Optional: `xlsxwriter` (faster Excel output; falls back to an `openpyxl` write-only workbook)
 
 Author:
 -------
@@ -57,15 +64,39 @@ This script is released into the public domain (CC0-style). Free to reuse, adapt
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
 import re
+import time
+import json
 import urllib.parse
-import pandas as pd
+try:
+    import orjson  # Optional: faster JSON decoding of the (large) API responses
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+try:
+    import re2  # Optional: google-re2, a linear-time (DFA) drop-in for the date scan
+except ImportError:
+    re2 = re
 import datetime
+import csv
+import itertools
+import sqlite3
+import threading
+from functools import lru_cache
 import openpyxl
 from pathlib import Path
+try:
+    import xlsxwriter  # Optional: faster Excel writer than openpyxl
+    EXCEL_WRITER_ENGINE = "xlsxwriter"
+except ImportError:
+    EXCEL_WRITER_ENGINE = "openpyxl"
 
 # List of templates to exclude (case-insensitive, supports wildcards for regex filtering)
-EXCLUDED_TEMPLATES = {
+EXCLUDED_TEMPLATES = frozenset({
     '1937',
     '1937 03 17',
     'after',
@@ -162,15 +193,62 @@ EXCLUDED_TEMPLATES = {
     'van eyck to bruegel, 1400-1550',
     'verzameling f. koenigs',
     'vlaamsche kunst',
-    'wga'
-}
-
-WRAPPER_TEMPLATES = ['Information', 'information','Photograph','photograph', 'Artwork', 'artwork', 'Art Photo','Art photo','Book','book']
-
-LANGUAGE_TEMPLATE_PATTERN = re.compile(r'^[a-z]{2,3}$', re.IGNORECASE)
-ONZE_PATTERN = re.compile(r'^onze afgevaardigden.*$', re.IGNORECASE)
-DEFAULTSORT_PATTERN = re.compile(r'^defaultsort[: ]', re.IGNORECASE)
-COLON_TEMPLATE_PATTERN = re.compile(r'^.*:.*$') #{{Creator:Hendrik Jan Bulthuis}}, {{User:Wdwdbot}}, {{ucfirst: {{Anonymous}} or {{Template:Something}}
+    'wga',
+})
+
+# Columns of the long-format results CSV (one row per file/template pair)
+LONG_FORMAT_COLUMNS = ['File URL', 'NumberOfTemplates', 'YearOfPublicationOrCreation', 'Template', 'Template URL']
+
+# Number of MediaWiki API batches fetched concurrently
+MAX_WORKERS = 8
+
+# Wikitext parsing runs in worker processes (one per CPU core by default), on windows of
+# PARSE_WINDOW files at a time, handed to the workers in chunks of PARSE_CHUNKSIZE files
+PARSE_WINDOW = 500
+PARSE_CHUNKSIZE = 32
+
+API_URL = "https://commons.wikimedia.org/w/api.php"
+MAXLAG = 5  # Seconds of database replication lag at which the API asks bots to back off
+USER_AGENT = "OlafJanssenBot/1.0 (https://commons.wikimedia.org/wiki/User:OlafJanssenBot; Python script)"
+
+# On-disk cache of file wikitexts keyed by title + revision ID, reused across runs
+WIKITEXT_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "wikitext_cache.sqlite"
+WIKITEXT_CACHE_LOCK = threading.Lock()
+
+# Wrapper template names, lowercase (matching against the wikitext is case-insensitive)
+WRAPPER_TEMPLATES = ['information', 'photograph', 'artwork', 'art photo', 'book']
+WRAPPER_TEMPLATE_SET = frozenset(WRAPPER_TEMPLATES)
+WRAPPER_START_PATTERN = re.compile(r'\{\{(' + '|'.join(re.escape(w) for w in WRAPPER_TEMPLATES) + ')', re.IGNORECASE)
+
+# Combined exclusion test, anchored at the start of the (lowercased) name:
+# {{DEFAULTSORT:...}}, {{onze afgevaardigden...}}, language codes such as {{en}} or {{nl}},
+# and any name containing a colon ({{Creator:Hendrik Jan Bulthuis}}, {{User:Wdwdbot}}, {{ucfirst: {{Anonymous}}, ...)
+EXCLUSION_PATTERN = re.compile(r'^(?:defaultsort[: ]|onze afgevaardigden|[a-z]{2,3}$|[^:]*:)', re.IGNORECASE)
+
+# Patterns used when simplifying date strings (compiled once, reused for every file)
+CITE_TEMPLATE_PATTERN = re.compile(r'\{\{\s*cite\s+(news|web|book|journal)[^\}]*\}\}', re.IGNORECASE)
+ACCESS_ARCHIVE_DATE_PATTERN = re.compile(r'\|\s*([Aa]ccessdate|[Aa]ccess-date|[Aa]rchivedate|[Aa]rchive-date)\s*=\s*[^\|\n]+', re.IGNORECASE)
+DEAD_LINK_PATTERN = re.compile(r'\{\{[Dd]ead link\|date=\w+\s+\d{4}.*?\}\}', re.IGNORECASE)
+UCFIRST_PATTERN = re.compile(r'\{\{[Uu][Cc]first:\s*(\{\{.*?\}\})\s*\}\}')
+COMPLEX_DATE_CENTURY_PATTERN = re.compile(r'\|\s*century\s*\|\s*(\d{1,2})')
+COMPLEX_DATE_ADJ_PATTERN = re.compile(r'\|\s*adj1\s*=\s*(\w+)')
+
+# All other date shapes are matched in one linear-time scan (RE2 when available, see imports):
+# {{circa|1939}}, {{other date|century|16}}, {{other date|?}}, {{taken on|1918-12-21}} or a bare 4-digit year
+DATE_TOKEN_PATTERN = re2.compile(
+    r'(?P<circa>\{\{\s*[Cc]irca\s*\|\s*(?P<circa_year>\d{4})\s*\}\})'
+    r'|(?P<century>\{\{\s*[Oo]ther date\s*\|\s*century\s*\|\s*(?P<century_number>\d{1,2}))'
+    r'|(?P<unknown>\{\{\s*[Oo]ther date\s*\|\s*\?\s*\}\})'
+    r'|(?P<taken_on>\{\{\s*[Tt]aken on\s*\|\s*(?P<taken_on_year>\d{4})-\d{2}-\d{2})'
+    r'|(?P<year>\d{4})'
+)
+YEAR_PATTERN = re2.compile(r'\d{4}')  # The same bare-year scan, for values without any templates
+
+# Patterns used when extracting templates from wikitext
+EMBEDDED_TEMPLATE_PATTERN = re.compile(r'\{\{([^\|\}\n]+)')
+TOP_LEVEL_TEMPLATE_PATTERN = re.compile(r'^\s*\{\{([^\|\}\n]+)', re.MULTILINE)
+FIELD_KEY_PATTERN = re.compile(r'\|\s*(date|publication date|permission)\s*=', re.IGNORECASE)
+FIELD_VALUE_PATTERN = re.compile(r'\s*(.+?)(?=\n\||\n*$)', re.DOTALL)
 
 def extract_year_from_date_string(date_str):
     """
@@ -192,58 +270,71 @@ def extract_year_from_date_string(date_str):
         str: Parsed date (e.g., '1939', '20th century', or 'Unknown')
     """
     try:
+        # --- Fast path: plain values without templates (e.g. 1939 or 1939-04-03) → latest 4-digit year ---
+        if '{{' not in date_str:
+            if '|' in date_str:
+                date_str = ACCESS_ARCHIVE_DATE_PATTERN.sub('', date_str)
+            valid_years = [y for y in YEAR_PATTERN.findall(date_str) if 1000 <= int(y) <= 2100]
+            return max(valid_years) if valid_years else date_str.strip()
+
         lower = date_str.lower()
 
         # --- Strip metadata noise that can corrupt fallback year parsing ---
+        # (each pattern only runs when its literal is present, so most values skip these scans)
         # Remove citation templates entirely
-        date_str = re.sub(r'\{\{\s*cite\s+(news|web|book|journal)[^\}]*\}\}', '', date_str, flags=re.IGNORECASE)
+        if 'cite' in lower:
+            date_str = CITE_TEMPLATE_PATTERN.sub('', date_str)
         # Remove known non-creation date fields
-        date_str = re.sub(r'\|\s*([Aa]ccessdate|[Aa]ccess-date|[Aa]rchivedate|[Aa]rchive-date)\s*=\s*[^\|\n]+', '', date_str, flags=re.IGNORECASE)
-        date_str = re.sub(r'\{\{[Dd]ead link\|date=\w+\s+\d{4}.*?\}\}', '', date_str, flags=re.IGNORECASE)
+        if '|' in date_str:
+            date_str = ACCESS_ARCHIVE_DATE_PATTERN.sub('', date_str)
+        if 'dead link' in date_str.lower():
+            date_str = DEAD_LINK_PATTERN.sub('', date_str)
 
         # --- Unwrap any ucfirst: {{...}} ---
-        nested_match = re.search(r'\{\{[Uu][Cc]first:\s*(\{\{.*?\}\})\s*\}\}', date_str)
-        if nested_match:
-            date_str = nested_match.group(1)
+        # (cheap substring guard first: most date values contain no ucfirst wrapper at all)
+        if 'first:' in date_str:
+            nested_match = UCFIRST_PATTERN.search(date_str)
+            if nested_match:
+                date_str = nested_match.group(1)
 
         # --- {{complex date|century|20|adj1=early}} → Early 20th century ---
         if '{{complex date' in lower:
-            century_match = re.search(r'\|\s*century\s*\|\s*(\d{1,2})', date_str)
-            adj_match = re.search(r'\|\s*adj1\s*=\s*(\w+)', date_str)
+            century_match = COMPLEX_DATE_CENTURY_PATTERN.search(date_str)
+            adj_match = COMPLEX_DATE_ADJ_PATTERN.search(date_str)
             if century_match:
                 century = int(century_match.group(1))
                 adjective = adj_match.group(1).capitalize() + ' ' if adj_match else ''
                 return f"{adjective}{century}th century"
 
+        # --- Single scan for the remaining date shapes, applied in order of precedence below ---
+        first_match = {}
+        years = []
+        for match in DATE_TOKEN_PATTERN.finditer(date_str):
+            for kind in ('circa', 'century', 'unknown', 'taken_on'):
+                if match.group(kind) is not None:
+                    first_match.setdefault(kind, match)
+                    break
+            else:
+                years.append(match.group('year'))
+
         # --- {{circa|1939}} → 1939 ---
-        circa_match = re.search(r'\{\{\s*[Cc]irca\s*\|\s*(\d{4})\s*\}\}', date_str)
-        if circa_match:
-            return circa_match.group(1)
+        if 'circa' in first_match:
+            return first_match['circa'].group('circa_year')
 
         # --- {{other date|century|16}} → 16th century ---
-        century_match = re.search(r'\{\{\s*[Oo]ther date\s*\|\s*century\s*\|\s*(\d{1,2})', date_str)
-        if century_match:
-            return f"{century_match.group(1)}th century"
+        if 'century' in first_match:
+            return f"{first_match['century'].group('century_number')}th century"
 
         # --- {{other date|?|...}} → Unknown ---
-        if re.search(r'\{\{\s*[Oo]ther date\s*\|\s*\?\s*\}\}', date_str):
+        if 'unknown' in first_match:
             return "Unknown"
 
         # --- {{taken on|YYYY-MM-DD}} → YYYY ---
-        taken_on_match = re.search(r'\{\{\s*[Tt]aken on\s*\|\s*(\d{4})-\d{2}-\d{2}', date_str)
-        if taken_on_match:
-            return taken_on_match.group(1)
-
-        # --- Catch all other {{other date|...}} variations and extract latest year ---
-        if '{{other date' in lower:
-            all_years = re.findall(r'\d{4}', date_str)
-            valid_years = [y for y in all_years if 1000 <= int(y) <= 2100]
-            if valid_years:
-                return max(valid_years)
-
-        # --- Final fallback: any 4-digit year ---
-        fallback_years = re.findall(r'\d{4}', date_str)
-        valid_years = [y for y in fallback_years if 1000 <= int(y) <= 2100]
+        if 'taken_on' in first_match:
+            return first_match['taken_on'].group('taken_on_year')
+
+        # --- Any other value, including other {{other date|...}} variations: latest 4-digit year ---
+        valid_years = [y for y in years if 1000 <= int(y) <= 2100]
         if valid_years:
             return max(valid_years)
 
@@ -256,6 +347,7 @@ def extract_year_from_date_string(date_str):
 
 
 
+@lru_cache(maxsize=4096)
 def is_excluded_template(name):
     """
     Determines whether a template name should be excluded based on known irrelevant, generic,
@@ -266,152 +358,355 @@ def is_excluded_template(name):
     - Matches known patterns like {{DEFAULTSORT}}, {{onze afgevaardigden...}}, or language codes (e.g., "en", "nl")
     - Contains a colon (used for namespaced or nested templates)
 
+    Results are memoized, since the same template names recur across thousands of files.
+
     Args:
         name (str): The name of the template to check.
 
     Returns:
         bool: True if the template should be excluded, False otherwise.
     """
-    try:
-        name_lc = name.lower()
-        return (
-            name_lc in EXCLUDED_TEMPLATES
-            or DEFAULTSORT_PATTERN.match(name_lc)
-            or ONZE_PATTERN.match(name_lc)
-            or LANGUAGE_TEMPLATE_PATTERN.match(name_lc)
-            or COLON_TEMPLATE_PATTERN.match(name)
-        )
-    except Exception as e:
-        print(f"Error checking if template is excluded ({name}): {e}")
-        return False
+    name_lc = name.lower()
+    return name_lc in EXCLUDED_TEMPLATES or EXCLUSION_PATTERN.match(name_lc) is not None
 
 
-def get_wikitext(title):
+def create_session(pool_size=MAX_WORKERS):
     """
-    Retrieves the raw wikitext of a Wikimedia Commons page by its title.
+    Creates a `requests.Session` for MediaWiki API calls with connection pooling and retries.
 
-    Uses the MediaWiki API (`action=parse`) to fetch the 'wikitext' property of the specified page.
-    If the request fails or the expected response format is missing, returns an empty string.
+    The session sends the bot User-Agent and asks for gzip-compressed responses on every call,
+    keeps up to `pool_size` connections to Commons open so that (concurrent) requests reuse
+    TCP/TLS connections, and retries with exponential back-off when the API signals rate
+    limiting or a temporary server error (HTTP 429/5xx).
 
     Args:
-        title (str): The title of the Wikimedia Commons page (e.g., "File:Example.jpg").
+        pool_size (int): Maximum number of pooled connections (match the number of worker threads).
 
     Returns:
-        str: The raw wikitext of the page, or an empty string if an error occurs.
+        requests.Session: The configured session.
     """
-    try:
-        url = 'https://commons.wikimedia.org/w/api.php'
-        params = {
-            'action': 'parse',
-            'page': title,
-            'prop': 'wikitext',
-            'format': 'json'
-        }
-        headers = {"User-Agent": "OlafJanssenBot/1.0 (https://commons.wikimedia.org/wiki/User:OlafJanssenBot; Python script)"}
-        response = requests.get(url, params=params, headers=headers).json()
-        return response['parse']['wikitext']['*']
-    except Exception as e:
-        print(f"Error fetching wikitext for {title}: {e}")
-        return ''
+    retry = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+    session.mount("https://", adapter)
+    return session
+
 
+# Shared session for all MediaWiki API calls, so connections are reused across the whole run
+SESSION = create_session()
 
 
-def search_files_from_category_excluding_term(include_term, exclude_term, limit=500):
+def api_get(session, params, max_lag_retries=5):
     """
-    Searches Wikimedia Commons for files in one category while excluding files from another.
+    Performs a MediaWiki API GET request and returns the decoded JSON response.
 
-    Uses the MediaWiki search API to find files (namespace 6) that are in the `include_term` category
-    but not in the `exclude_term` category. Fetches results in batches using pagination.
+    Every request carries `maxlag`, so that the API can ask the bot to pause while the
+    servers are lagging; such 'maxlag' errors are retried after the advertised Retry-After delay.
 
     Args:
-        include_term (str): The name of the category to include (e.g., "Media from Delpher").
-        exclude_term (str): The name of the category to exclude (e.g., "Scans from the Internet Archive").
-        limit (int): The number of results to retrieve per API call (max 500).
+        session (requests.Session): Session used for the API call (e.g., `SESSION`).
+        params (dict): The API query parameters.
+        max_lag_retries (int): How often to retry while the API reports replication lag.
 
     Returns:
-        list[str]: A list of file titles (e.g., "File:Example.jpg"). Empty if the request fails.
+        dict: The decoded JSON response.
+
+    Raises:
+        RuntimeError: If the API reports any other error (e.g., 'ratelimited', 'internal_api_error_*'),
+            or still reports replication lag after `max_lag_retries` attempts.
     """
-    print(f"🔍 Fetching files in category '{include_term}' excluding '{exclude_term}'...")
-    try:
-        SEARCH_URL = "https://commons.wikimedia.org/w/api.php"
-        offset = 0
-        all_titles = []
+    params = {**params, "maxlag": MAXLAG}
+    for _ in range(max_lag_retries):
+        response = session.get(API_URL, params=params)
+        data = json_loads(response.content)
+        error = data.get("error")
+        if error is None:
+            return data
+        if error.get("code") != "maxlag":
+            raise RuntimeError(f"MediaWiki API error: {error.get('code')}: {error.get('info', '')}")
+        time.sleep(int(response.headers.get("Retry-After", MAXLAG)))
+    raise RuntimeError(f"MediaWiki API still lagging after {max_lag_retries} attempts")
+
+
+def open_wikitext_cache(path=WIKITEXT_CACHE_PATH):
+    """
+    Opens (and creates if needed) the on-disk SQLite cache of file wikitexts.
 
-        while True:
-            params = {
-                "action": "query",
-                "format": "json",
-                "list": "search",
-                "srsearch": f"incategory:\"{include_term}\" -incategory:\"{exclude_term}\"",
-                "srlimit": limit,
-                "srnamespace": 6,
-                "sroffset": offset
-            }
-            headers = {"User-Agent": "OlafJanssenBot/1.0 (https://commons.wikimedia.org/wiki/User:OlafJanssenBot; Python script)"}
-            response = requests.get(SEARCH_URL, params=params, headers=headers).json()
-            results = response.get("query", {}).get("search", [])
-            all_titles.extend(["File:" + r["title"].replace("File:", "") for r in results])
-
-            if "continue" in response:
-                offset = response["continue"]["sroffset"]
-            else:
-                break
+    The cache stores the wikitext of each file together with the revision ID it belongs to,
+    so that re-runs only download the content of files that were edited since the last run.
+    The connection may be shared by the fetch threads; access is serialized with `WIKITEXT_CACHE_LOCK`.
 
-        return all_titles
-    except Exception as e:
-        print(f"Error during search API call: {e}")
-        return []
+    Args:
+        path (Path): Location of the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: Open connection to the cache database.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cache = sqlite3.connect(path, check_same_thread=False)
+    cache.execute('CREATE TABLE IF NOT EXISTS cache (title TEXT PRIMARY KEY, revid INTEGER, wikitext TEXT)')
+    return cache
 
 
-def extract_balanced_template(wikitext, template_name):
+def fetch_wikitexts_by_revid(session, revids):
     """
-    Extracts the full content of a wrapper template block (e.g., {{Photograph}}, {{Information}})
-    from the given wikitext, including nested templates and multiline fields.
+    Fetches the wikitext of the given page revisions with one MediaWiki API query.
 
-    This function uses brace-depth tracking to ensure the entire balanced template
-    is returned even if it contains deeply nested or multi-line sub-templates.
+    If the API cannot return the content of all revisions in one response, the revision
+    continuation (`rvcontinue`) is followed until all of them are fetched.
 
     Args:
-        wikitext (str): The full page wikitext.
-        template_name (str): The name of the wrapper template to extract.
+        session (requests.Session): Session used for the API calls.
+        revids (list[int]): Revision IDs to fetch (max 50).
 
     Returns:
-        str: The full balanced block as a string, or an empty string if not found.
+        dict[int, str]: Raw wikitext per revision ID.
+
+    Raises:
+        RuntimeError: If the API does not return some of the revisions (e.g., deleted in the meantime).
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "prop": "revisions",
+        "revids": "|".join(str(revid) for revid in revids),
+        "rvprop": "ids|content",
+        "rvslots": "main"
+    }
+    wikitexts = {}
+
+    while True:
+        response = api_get(session, params)
+        for page in response.get("query", {}).get("pages", {}).values():
+            for revision in page.get("revisions", []):
+                wikitexts[revision["revid"]] = revision.get("slots", {}).get("main", {}).get("*", "")
+
+        continuation = response.get("continue", {})
+        if "rvcontinue" not in continuation:
+            break
+        params.update(continuation)
+
+    missing = [revid for revid in revids if revid not in wikitexts]
+    if missing:
+        raise RuntimeError(f"MediaWiki API returned no content for revision(s) {', '.join(map(str, missing))}")
+    return wikitexts
+
+
+def fetch_search_batch(session, search_query, offset, limit=50, cache=None, ids_only=False):
+    """
+    Fetches one batch of search results, including the wikitext of each result page.
+
+    Uses the MediaWiki API (`action=query`) with `generator=search` and `prop=revisions`.
+    If the API cannot return the content of all pages in one response, the revision
+    continuation (`rvcontinue`) is followed until the batch is complete.
+
+    With a wikitext `cache`, the fetched wikitexts are stored in the cache. With `ids_only`, the
+    search only returns the current revision ID of each page instead; wikitexts are taken from
+    the cache when the revision is unchanged, and only the remaining ones are downloaded
+    (see `fetch_wikitexts_by_revid`) and stored in the cache.
+
+    Args:
+        session (requests.Session): Session used for the API calls.
+        search_query (str): The CirrusSearch query (e.g., 'incategory:"Media from Delpher"').
+        offset (int): Offset of the first search result in this batch.
+        limit (int): The number of pages in the batch (max 50 when fetching content).
+        cache (sqlite3.Connection, optional): Wikitext cache opened with `open_wikitext_cache`.
+        ids_only (bool): Search for revision IDs only and take unchanged wikitexts from the `cache`.
+
+    Returns:
+        tuple:
+            list[tuple[str, str]]: (file title, raw wikitext) pairs for this batch, in search rank order.
+            bool: True if more search results exist after this batch, False otherwise.
+            int: The number of wikitexts that were not in the cache and had to be downloaded separately.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "generator": "search",
+        "gsrsearch": search_query,
+        "gsrlimit": limit,
+        "gsrnamespace": 6,
+        "gsroffset": offset,
+        "prop": "revisions",
+        "rvprop": "ids" if ids_only else "ids|content",
+        "rvslots": "main"
+    }
+    revisions = {}  # title -> [revid, wikitext]
+    ranks = {}  # title -> search rank; the API lists the pages by page ID, not by rank
+
+    while True:
+        response = api_get(session, params)
+        pages = response.get("query", {}).get("pages", {})
+        for page in pages.values():
+            page_revisions = page.get("revisions")
+            if not page_revisions:
+                continue  # Content for this page follows in the rvcontinue response
+            wikitext = page_revisions[0].get("slots", {}).get("main", {}).get("*", "")
+            # Results are limited to the File namespace, so titles already carry the "File:" prefix
+            revisions[page["title"]] = [page_revisions[0].get("revid"), wikitext]
+            ranks[page["title"]] = page.get("index", 0)
+
+        continuation = response.get("continue", {})
+        if "rvcontinue" in continuation:
+            params.update(continuation)
+        else:
+            has_more = "gsroffset" in continuation
+            break
+
+    missing = {}
+    if ids_only:
+        # Use cached wikitext for unchanged revisions, download the rest
+        with WIKITEXT_CACHE_LOCK:
+            for title, revision in revisions.items():
+                row = cache.execute('SELECT wikitext FROM cache WHERE title = ? AND revid = ?', (title, revision[0])).fetchone()
+                if row:
+                    revision[1] = row[0]
+                else:
+                    missing[revision[0]] = title
+
+        if missing:
+            downloaded = fetch_wikitexts_by_revid(session, list(missing))
+            with WIKITEXT_CACHE_LOCK:
+                for revid, wikitext in downloaded.items():
+                    revisions[missing[revid]][1] = wikitext
+                    cache.execute('INSERT OR REPLACE INTO cache (title, revid, wikitext) VALUES (?, ?, ?)',
+                                  (missing[revid], revid, wikitext))
+                cache.commit()
+    elif cache is not None:
+        # Content came with the search results; keep it for the next run
+        with WIKITEXT_CACHE_LOCK:
+            cache.executemany('INSERT OR REPLACE INTO cache (title, revid, wikitext) VALUES (?, ?, ?)',
+                              ((title, revid, wikitext) for title, (revid, wikitext) in revisions.items()))
+            cache.commit()
+
+    results = [(title, wikitext) for title, (revid, wikitext) in sorted(revisions.items(), key=lambda item: ranks[item[0]])]
+    return results, has_more, len(missing)
+
+
+def search_files_from_category_excluding_term(include_term, exclude_term, limit=50, max_workers=MAX_WORKERS, cache=None):
+    """
+    Searches Wikimedia Commons for files in one category while excluding files from another,
+    and yields the raw wikitext of each file alongside its title.
+
+    Finds files (namespace 6) that are in the `include_term` category but not in the `exclude_term`
+    category, fetching their wikitext together with the search results (see `fetch_search_batch`).
+    Batches are requested concurrently, `max_workers` offsets at a time, over the shared `SESSION`;
+    results are yielded in search order until the API reports there are no more results.
+
+    With a `cache`, batches first ask for revision IDs only, so that unchanged wikitexts are not
+    downloaded again. That costs a second request for the changed files of each batch, so it is
+    only done when the cache is filled: on a first run, and as soon as most files of a round of
+    batches turned out to be changed, the content is fetched with the search results again.
+
+    Args:
+        include_term (str): The name of the category to include (e.g., "Media from Delpher").
+        exclude_term (str): The name of the category to exclude (e.g., "Scans from the Internet Archive").
+        limit (int): The number of pages to retrieve per API call (max 50 when fetching content).
+        max_workers (int): The number of batches fetched concurrently.
+        cache (sqlite3.Connection, optional): Wikitext cache; only changed files are downloaded.
+
+    Yields:
+        tuple[str, str]: (file title, raw wikitext), e.g. ("File:Example.jpg", "{{Information ...}}").
+
+    Raises:
+        Exception: Any error of a batch request is passed on to the caller, so that an
+        incomplete crawl is never taken for a complete one.
+    """
+    print(f"🔍 Fetching files in category '{include_term}' excluding '{exclude_term}'...")
+    search_query = f"incategory:\"{include_term}\" -incategory:\"{exclude_term}\""
+    offset = 0
+    ids_only = cache is not None and cache.execute('SELECT 1 FROM cache LIMIT 1').fetchone() is not None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            offsets = [offset + i * limit for i in range(max_workers)]
+            batches = executor.map(
+                lambda o: fetch_search_batch(SESSION, search_query, o, limit, cache, ids_only), offsets)
+            fetched = downloaded = 0
+            for results, has_more, changed in batches:
+                yield from results
+                if not has_more:
+                    return
+                fetched += len(results)
+                downloaded += changed
+            # Mostly changed files: the revision ID search only adds a request per batch
+            if ids_only and downloaded * 2 > fetched:
+                ids_only = False
+            offset += max_workers * limit
+
+
+def extract_balanced_block(wikitext, start):
     """
-    start = wikitext.lower().find(f'{{{{{template_name.lower()}')
-    if start == -1:
-        return ''
+    Returns the balanced template block that opens with the '{{' at position `start`
+    (e.g., a full {{Photograph}} wrapper), including nested templates and multiline fields.
 
+    Tracks the brace depth, jumping between '{{' and '}}' tokens using `str.find`, so plain text is skipped in C.
+
+    Args:
+        wikitext (str): The full page wikitext.
+        start (int): Position of the opening '{{' of the template.
+
+    Returns:
+        str: The full balanced block as a string, or an empty string if it is never closed.
+    """
     depth = 0
     i = start
-    while i < len(wikitext) - 1:
-        if wikitext[i:i + 2] == '{{':
+    while True:
+        close_pos = wikitext.find('}}', i)
+        if close_pos == -1:
+            return ''  # Unbalanced: template is never closed
+        open_pos = wikitext.find('{{', i, close_pos)
+        if open_pos != -1:
             depth += 1
-            i += 2
-        elif wikitext[i:i + 2] == '}}':
+            i = open_pos + 2
+        else:
             depth -= 1
-            i += 2
+            i = close_pos + 2
             if depth == 0:
                 return wikitext[start:i]
-        else:
-            i += 1
-    return ''
 
 
-def extract_template_field(block, fieldname):
+def extract_template_fields(block):
     """
-    Extracts a specific |field= value from a wikitext template block (multiline-safe).
+    Extracts the |date=, |publication date= and |permission= values from a wrapper template block
+    in a single scan, instead of one full search per field.
+
+    The first occurrence of each field is used (multiline-safe): its value runs up to the next
+    line starting with '|' (or the end of the block).
 
     Args:
         block (str): Template content (e.g., full {{Photograph ...}} block)
-        fieldname (str): The name of the field (e.g., 'date')
 
     Returns:
-        str: Extracted field value or empty string if not found
+        dict[str, str]: Field name (lowercase) → stripped value, for the fields present in the block.
+    """
+    fields = {}
+    for key_match in FIELD_KEY_PATTERN.finditer(block):
+        key = key_match.group(1).lower()
+        if key in fields:
+            continue
+        value_match = FIELD_VALUE_PATTERN.match(block, key_match.end())
+        fields[key] = value_match.group(1).strip() if value_match else ''
+        if len(fields) == 3:
+            break
+    return fields
+
+
+def add_embedded_templates(value, all_templates):
+    """
+    Adds the (non-excluded) templates used inside a field value to `all_templates`, as '{{Name}}'.
+
+    Args:
+        value (str): A field value, e.g. '{{PD-old-70}} {{Anonymous-EU}}'
+        all_templates (set[str]): The set of templates found so far (updated in place).
+
+    Returns:
+        None
     """
-    pattern = re.compile(rf'\|\s*{fieldname}\s*=\s*(.+?)(?=\n\||\n*$)', re.IGNORECASE | re.DOTALL)
-    match = pattern.search(block)
-    return match.group(1).strip() if match else ''
+    # Deduplicate (order-preserving) first, so each distinct name is checked and formatted once
+    names = dict.fromkeys(EMBEDDED_TEMPLATE_PATTERN.findall(value))
+    all_templates.update(f"{{{{{name.strip()}}}}}" for name in names if not is_excluded_template(name))
 
 
 def extract_templates_and_date(wikitext):
@@ -434,48 +729,49 @@ def extract_templates_and_date(wikitext):
             str: Simplified creation date (e.g. '1939', 'Unknown', '20th century')
     """
     try:
+        # Without any template transclusion there is nothing to extract; skip all scans
+        if '{{' not in wikitext:
+            return [], ''
+
         all_templates = set()
         creation_date = ''
+        # Locate the first occurrence of every wrapper template in one case-insensitive pass
+        wrapper_starts = {}
+        for match in WRAPPER_START_PATTERN.finditer(wikitext):
+            wrapper_starts.setdefault(match.group(1).lower(), match.start())
 
         for wrapper in WRAPPER_TEMPLATES:
-            wrapper_block = extract_balanced_template(wikitext, wrapper)
+            if wrapper not in wrapper_starts:
+                continue
+            wrapper_block = extract_balanced_block(wikitext, wrapper_starts[wrapper])
             if wrapper_block:
+                # One scan of the block for the |date=, |publication date= and |permission= fields
+                fields = extract_template_fields(wrapper_block)
+
                 # --- DATE ---
-                raw_date = extract_template_field(wrapper_block, 'date')
+                raw_date = fields.get('date')
                 if raw_date:
                     creation_date = extract_year_from_date_string(raw_date)
-                    embedded_templates = re.findall(r'\{\{([^\|\}\n]+)', raw_date)
-                    for dt in embedded_templates:
-                        clean = f"{{{{{dt.strip()}}}}}"
-                        if not is_excluded_template(dt):
-                            all_templates.add(clean)
+                    add_embedded_templates(raw_date, all_templates)
 
                 # --- PUBLICATION DATE ---
                 if not creation_date:
-                    raw_pubdate = extract_template_field(wrapper_block, 'publication date')
+                    raw_pubdate = fields.get('publication date')
                     if raw_pubdate:
                         creation_date = extract_year_from_date_string(raw_pubdate)
-                        embedded_templates = re.findall(r'\{\{([^\|\}\n]+)', raw_pubdate)
-                        for dt in embedded_templates:
-                            clean = f"{{{{{dt.strip()}}}}}"
-                            if not is_excluded_template(dt):
-                                all_templates.add(clean)
+                        add_embedded_templates(raw_pubdate, all_templates)
 
                 # --- PERMISSION ---
-                raw_permission = extract_template_field(wrapper_block, 'permission')
+                raw_permission = fields.get('permission')
                 if raw_permission:
-                    embedded_templates = re.findall(r'\{\{([^\|\}\n]+)', raw_permission)
-                    for t in embedded_templates:
-                        clean = f"{{{{{t.strip()}}}}}"
-                        if not is_excluded_template(t):
-                            all_templates.add(clean)
+                    add_embedded_templates(raw_permission, all_templates)
 
         # --- TOP-LEVEL templates ---
-        top_level_matches = re.findall(r'^\s*\{\{([^\|\}\n]+)', wikitext, re.MULTILINE)
-        for t in top_level_matches:
-            clean = t.strip()
-            if not is_excluded_template(clean) and clean not in WRAPPER_TEMPLATES:
-                all_templates.add(f"{{{{{clean}}}}}")
+        all_templates.update(
+            f"{{{{{clean}}}}}"
+            for clean in (match.group(1).strip() for match in TOP_LEVEL_TEMPLATE_PATTERN.finditer(wikitext))
+            if clean.lower() not in WRAPPER_TEMPLATE_SET and not is_excluded_template(clean)
+        )
 
         return sorted(all_templates), creation_date
 
@@ -484,60 +780,128 @@ def extract_templates_and_date(wikitext):
         return [], ''
 
 
-def process_templates_for_category(include_term, exclude_term):
+@lru_cache(maxsize=4096)
+def template_url(template):
+    """
+    Returns the Commons documentation page URL of a template, e.g. '{{PD-old}}' → '.../wiki/Template:PD-old'.
+
+    Results are memoized, since the same templates recur across thousands of files.
+
+    Args:
+        template (str): The template as '{{Name}}'.
+
+    Returns:
+        str: The URL of the template page.
+    """
+    return "https://commons.wikimedia.org/wiki/Template:" + template.strip('{}').replace(' ', '_')
+
+
+def parse_pages(pages, pool, window=PARSE_WINDOW, chunksize=PARSE_CHUNKSIZE):
+    """
+    Runs `extract_templates_and_date` over a stream of pages in a process pool, preserving their order.
+
+    The pages are consumed in windows of `window` files, so only one window of wikitexts
+    is held in memory (and in flight to the worker processes) at a time.
+
+    Args:
+        pages (iterable[tuple[str, str]]): (title, wikitext) pairs.
+        pool (concurrent.futures.Executor): The pool that parses the wikitexts.
+        window (int): Number of pages submitted to the pool at once.
+        chunksize (int): Number of pages sent to a worker process per task.
+
+    Yields:
+        tuple[str, list[str], str]: (title, templates, creation_date) per page.
+    """
+    pages = iter(pages)
+    while True:
+        batch = list(itertools.islice(pages, window))
+        if not batch:
+            return
+        titles = [title for title, _ in batch]
+        wikitexts = [wikitext for _, wikitext in batch]
+        for title, (templates, creation_date) in zip(
+                titles, pool.map(extract_templates_and_date, wikitexts, chunksize=chunksize)):
+            yield title, templates, creation_date
+
+
+def write_wide_excel(csv_path, output_path, max_templates):
+    """
+    Converts the long-format CSV (one row per file/template pair) into the wide Excel layout
+    (one row per file, with 'Template N' / 'Template N URL' column pairs), streaming row by row.
+
+    The rows of one file are contiguous in the CSV, so only one file is held in memory at a time.
+    Uses xlsxwriter in constant-memory mode when available, otherwise an openpyxl write-only workbook.
+    URLs are kept as plain text, which also avoids xlsxwriter's per-sheet hyperlink limit.
+
+    Args:
+        csv_path (Path): The long-format CSV written during the crawl (columns `LONG_FORMAT_COLUMNS`).
+        output_path (Path): The Excel file to write.
+        max_templates (int): The largest number of templates found for a single file.
+
+    Returns:
+        None
+    """
+    header = ['File URL', 'NumberOfTemplates', 'YearOfPublicationOrCreation']
+    for i in range(1, max_templates + 1):
+        header.extend([f'Template {i}', f'Template {i} URL'])
+
+    if EXCEL_WRITER_ENGINE == "xlsxwriter":
+        workbook = xlsxwriter.Workbook(str(output_path), {'constant_memory': True, 'strings_to_urls': False})
+        worksheet = workbook.add_worksheet('Sheet1')
+        worksheet.write_row(0, 0, header, workbook.add_format({'bold': True}))
+        row_number = 0
+
+        def append_row(row):
+            nonlocal row_number
+            row_number += 1
+            worksheet.write_row(row_number, 0, row)
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Sheet1')
+        worksheet.append(header)
+        append_row = worksheet.append
+
+    with open(csv_path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader)  # Skip the header
+        for file_url, rows in itertools.groupby(reader, key=lambda row: row[0]):
+            rows = list(rows)
+            row = [file_url, int(rows[0][1]), rows[0][2]]
+            for _, _, _, tpl, url in rows:
+                if tpl:
+                    row.extend([tpl, url])
+            append_row(row)
+
+    if EXCEL_WRITER_ENGINE == "xlsxwriter":
+        workbook.close()
+    else:
+        workbook.save(output_path)
+
+
+def process_templates_for_category(include_term, exclude_term, use_cache=True, parse_workers=None):
     """
     Main entry point: fetches Commons files in a target category and extracts template/date metadata.
 
     Steps:
-    - Searches Commons for files in one category (e.g., "Media from Delpher") excluding another (e.g., "Scans from the Internet Archive").
-    - For each file, retrieves wikitext and parses relevant templates and creation dates.
-    - Outputs to console and saves results as an Excel file with URLs and template links.
+    - Searches Commons for files in one category (e.g., "Media from Delpher") excluding another (e.g., "Scans from the Internet Archive"),
+      retrieving their wikitext in batches along with the search results.
+    - For each file, parses relevant templates and creation dates from the wikitext (in parallel worker processes).
+    - Outputs to console and streams the results to a long-format CSV file (one row per file/template pair),
+      so they are not held in memory during the crawl.
+    - Converts the CSV once into an Excel file with URLs and template links (one row per file),
+      streaming it row by row.
 
     Args:
         include_term (str): Category to include (e.g., "Media from Delpher")
         exclude_term (str): Category to exclude (e.g., "Scans from the Internet Archive")
+        use_cache (bool): Reuse wikitexts of unchanged files from the on-disk cache (`WIKITEXT_CACHE_PATH`).
+        parse_workers (int | None): Number of worker processes parsing the wikitexts (default: one per CPU core).
 
     Returns:
         None
     """
+    cache = open_wikitext_cache() if use_cache else None
     try:
-        file_titles = search_files_from_category_excluding_term(include_term, exclude_term)
-        file_titles = list(set(file_titles))  # Remove duplicates
-        records = []
-
-        for title in file_titles:
-            wikitext = get_wikitext(title)
-            file_url = "https://commons.wikimedia.org/wiki/" + urllib.parse.quote(title.replace(' ', '_'))
-            templates, creation_date = extract_templates_and_date(wikitext)
-
-            # Create (template, URL) pairs here
-            template_links = [
-                (tpl, f"https://commons.wikimedia.org/wiki/Template:{tpl.strip('{}').replace(' ', '_')}")
-                for tpl in templates
-            ]
-
-            # Console output
-            template_console = ', '.join([f"{tpl} ({url})" for tpl, url in template_links])
-            print(f"{file_url} - {len(template_links)} - Date: {creation_date} - {template_console}")
-
-            # Flatten for Excel: one row with file, date, template-URL pairs
-            row = [file_url, len(template_links), creation_date]
-            for tpl, url in template_links:
-                row.extend([tpl, url])
-            records.append(row)
-
-        if not records:
-            print("No valid files processed.")
-            return
-
-        # Build Excel header
-        max_tpls = max((len(r) - 3) // 2 for r in records)  # each template = 2 columns
-        columns = ['File URL', 'NumberOfTemplates', 'YearOfPublicationOrCreation']
-        for i in range(max_tpls):
-            columns.extend([f'Template {i+1}', f'Template {i+1} URL'])
-
-        df = pd.DataFrame(records, columns=columns)
-
         safe_category = include_term.replace(" ", "_")  # "Media_from_Delpher"
         timestamp = datetime.datetime.now().strftime("%d%m%Y")
         filename = f"{safe_category}-Extracted_copyright_templates-{timestamp}.xlsx"
@@ -546,16 +910,63 @@ def process_templates_for_category(include_term, exclude_term):
         data_folder = Path(__file__).resolve().parent.parent / "data"
         # Ensure the folder exists
         data_folder.mkdir(parents=True, exist_ok=True)
-        # Full output path
+        # Full output paths
         output_path = data_folder / filename
+        csv_path = output_path.with_suffix('.csv')
+        # The CSV is written under a temporary name and only renamed once the crawl has completed,
+        # so a failed run never leaves a dated (but truncated) CSV behind
+        partial_csv_path = csv_path.with_name(csv_path.name + '.part')
+
+        seen_titles = set()
+        max_templates = 0  # Number of 'Template N' column pairs needed in the Excel file
+
+        def unique_pages():
+            for title, wikitext in search_files_from_category_excluding_term(include_term, exclude_term, cache=cache):
+                if title in seen_titles:
+                    continue  # Remove duplicates
+                seen_titles.add(title)
+                yield title, wikitext
+
+        # The workers are started while the fetch threads hold connection and cache locks, so they are
+        # spawned as fresh interpreters instead of forked copies of this process (which could deadlock)
+        with open(partial_csv_path, 'w', newline='', encoding='utf-8') as csv_file, \
+                ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(LONG_FORMAT_COLUMNS)
+
+            for title, templates, creation_date in parse_pages(unique_pages(), pool):
+                file_url = "https://commons.wikimedia.org/wiki/" + urllib.parse.quote(title.replace(' ', '_'))
+
+                # Create (template, URL) pairs here
+                template_links = [(tpl, template_url(tpl)) for tpl in templates]
+
+                # Console output
+                template_console = ', '.join([f"{tpl} ({url})" for tpl, url in template_links])
+                print(f"{file_url} - {len(template_links)} - Date: {creation_date} - {template_console}")
+
+                max_templates = max(max_templates, len(template_links))
+
+                # Stream to CSV: one row per template (a single row with empty template if there are none)
+                for tpl, url in template_links or [('', '')]:
+                    csv_writer.writerow([file_url, len(template_links), creation_date, tpl, url])
+
+        if not seen_titles:
+            partial_csv_path.unlink()
+            print("No valid files processed.")
+            return
+        partial_csv_path.replace(csv_path)
+        print(f"✅ Results written to: {csv_path}")
 
-        # Write Excel file
-        df.to_excel(output_path, index=False)
+        # Convert the CSV into the wide Excel layout, streaming one file at a time
+        write_wide_excel(csv_path, output_path, max_templates)
         print(f"✅ Results written to: {output_path}")
 
 
     except Exception as e:
-        print(f"Error processing category: {e}")
+        print(f"Error processing category, no results written: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 # Entry point for script execution.
@@ -28,6 +28,10 @@ project-root/
 🔒 **Requirements**:
 - `.env` file containing the Datawrapper API token (`DW_API_TOKEN`).
 - `pandas`, `python-dotenv`, and `datawrapper` Python packages installed.
+- `_template_data.py` (shared Excel loading and link formatting) and `_datawrapper_chart.py` (shared chart
+  update/publish helpers) in the same folder as this script.
+- Optional: `python-calamine` for faster Excel parsing (falls back to `openpyxl`).
+- Optional: `pyarrow` for Arrow-backed string columns.
 
 📌 **Limitations**:
 - This script assumes that the target Datawrapper chart has already been created manually.
@@ -39,13 +43,14 @@ project-root/
 - Last updated: 25 April 2025
 """
 
-import os
 import pandas as pd
-from datawrapper import Datawrapper
-from dotenv import load_dotenv
 from pathlib import Path
 import json
-from typing import Dict
+from _template_data import read_template_sheet, format_template_links
+from _datawrapper_chart import (
+    load_chart_config, load_api_token, init_datawrapper, update_and_publish_chart, get_chart_visualize_config,
+    get_responsive_embed_code
+)
 
 def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
     """
@@ -56,7 +61,7 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
     - Loads data from the specified Excel sheet.
     - Verifies the presence of required columns.
     - Cleans and formats the columns.
-    - Optionally merges the 'NoCopyrightReason' column if it exists.
+    - Keeps the 'NoCopyrightReason' column if it exists.
     - Formats the 'Template' column as an HTML hyperlink using the 'TemplateURL'.
     - Sorts the results by 'NoCopyrightReason' (A-Z) and the number of files using the template (descending).
     - Returns the processed DataFrame ready for upload or further analysis.
@@ -76,9 +81,6 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
         Exception: Any unexpected error during processing is caught and logged.
     """
     try:
-        # Load Excel sheet
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
         # Required columns
         required_columns = [
             'Template',
@@ -86,45 +88,45 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
             'Description',
             'Number of files using this template'
         ]
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required column(s): {', '.join(missing_cols)}")
 
-        # Clean columns
-        df['Template'] = df['Template'].astype(str).str.strip()
-        df['TemplateURL'] = df['TemplateURL'].astype(str).str.strip()
-        df['Description'] = df['Description'].astype(str).str.strip()
+        # Load only the required (and the optional 'NoCopyrightReason') columns of the Excel sheet
+        df = read_template_sheet(
+            excel_path,
+            sheet_name,
+            required_columns,
+            optional_columns=('NoCopyrightReason',),
+            string_columns=('Template', 'TemplateURL', 'Description')
+        )
+
+        # Clean columns (already read as strings)
+        df['Template'] = df['Template'].str.strip()
+        df['TemplateURL'] = df['TemplateURL'].str.strip()
+        df['Description'] = df['Description'].str.strip()
+
+        # Keep NoCopyrightReason if available
+        if 'NoCopyrightReason' not in df.columns:
+            df['NoCopyrightReason'] = None
 
-        # Drop duplicates to create a summary
+        # Drop duplicates to create a summary: one row per template, in a single pass (no merge needed)
         summary_df = df[[
             'Template',
             'TemplateURL',
             'Description',
-            'Number of files using this template'
+            'Number of files using this template',
+            'NoCopyrightReason'
         ]].drop_duplicates(subset='Template')
 
-        # Merge NoCopyrightReason if available
-        if 'NoCopyrightReason' in df.columns:
-            reasons = df[['Template', 'NoCopyrightReason']].drop_duplicates()
-            summary_df = pd.merge(summary_df, reasons, on='Template', how='left')
-        else:
-            summary_df['NoCopyrightReason'] = None
-
-        # Format Template as HTML link
-        summary_df['Template'] = summary_df.apply(
-            lambda row: (
-                f'<a href="{row["TemplateURL"]}" style="color:#b1bfc3;" target="_blank" rel="nofollow noopener">{row["Template"].strip("{}")}</a>'
-                if pd.notnull(row["TemplateURL"]) else row["Template"]
-            ),
-            axis=1
-        )
-
-        # Sort by NoCopyrightReason (A-Z) and Number of files (descending)
+        # Sort by NoCopyrightReason (A-Z) and Number of files (descending); as a categorical
+        # (with sorted categories) the reasons are compared as integer codes instead of strings
+        summary_df['NoCopyrightReason'] = summary_df['NoCopyrightReason'].astype('category')
         summary_df = summary_df.sort_values(
             by=['NoCopyrightReason', 'Number of files using this template'],
             ascending=[True, False]
         )
 
+        # Format Template as HTML link
+        summary_df['Template'] = format_template_links(summary_df['Template'], summary_df['TemplateURL'])
+
         # Drop column before upload
         summary_df = summary_df.drop(columns=['Number of files using this template'])
 
@@ -140,138 +142,13 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
-def update_datawrapper_chart(
-    dw: Datawrapper,
-    chart_id: str,
-    data: pd.DataFrame,
-    config: Dict
-) -> None:
-    """
-    Uploads data, updates metadata and description, and publishes a Datawrapper chart.
-
-    This function performs the following:
-    - Uploads a pandas DataFrame directly into the specified Datawrapper chart.
-    - Updates chart metadata using the provided configuration dictionary.
-    - Sets the textual description for the chart (intro, byline, source).
-    - Publishes the chart on Datawrapper.
-    - Prints a confirmation message upon success.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The ID of the chart to update.
-        data (pd.DataFrame): The data to upload into the chart.
-        config (dict): Chart configuration containing 'title', 'visualize', 'annotate', 'publish', and 'description' keys.
-
-    Raises:
-        RuntimeError: If any step of the chart update or publishing process fails.
-    """
-    try:
-        # Upload data directly
-        dw.add_data(chart_id=chart_id, data=data)
-
-        # Update chart metadata
-        title = config.get("title", "Datawrapper Table")
-        dw.update_chart(
-            chart_id=chart_id,
-            title=title,
-            metadata={
-                "visualize": config.get("visualize", {}),
-                "annotate": config.get("annotate", {}),
-                "publish": config.get("publish", {})
-            }
-        )
-
-        # Update chart description
-        desc = config.get("description", {})
-        dw.update_description(
-            chart_id=chart_id,
-            intro=desc.get("intro", ""),
-            byline=desc.get("byline", ""),
-            source_name=desc.get("source-name", ""),
-            source_url=desc.get("source-url", ""),
-            aria_description=desc.get("aria-description", "")
-        )
-
-        # Publish chart
-        dw.publish_chart(chart_id=chart_id)
-        print(f"✅ Chart '{title}' updated and published successfully.")
-
-    except Exception as e:
-        raise RuntimeError(f"❌ Error while updating and publishing chart '{chart_id}': {e}")
-
-def load_api_token() -> str:
-    """Load the Datawrapper API token from .env."""
-    load_dotenv()
-    token = os.getenv("DW_API_TOKEN")
-    if not token:
-        raise ValueError("DW_API_TOKEN not found in environment variables.")
-    return token
-
-def load_config(config_path: Path) -> dict:
-    """Load chart configuration from JSON file."""
-    with open(config_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def init_datawrapper(api_token: str) -> Datawrapper:
-    """Initialize the Datawrapper API client."""
-    return Datawrapper(access_token=api_token)
-
-def get_chart_visualize_config(dw: Datawrapper, chart_id: str) -> dict:
-    """
-    Fetch the 'visualize' configuration section of a Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The ID of the chart whose configuration you want to fetch.
-
-    Returns:
-        dict: The 'visualize' configuration section of the chart metadata.
-
-    Raises:
-        RuntimeError: If the chart metadata could not be retrieved or if 'visualize' section is missing.
-    """
-    try:
-        chart_metadata = dw.get_chart(chart_id=chart_id)
-        visualize_config = chart_metadata.get("metadata", {}).get("visualize", {})
-
-        if not visualize_config:
-            raise RuntimeError(f"'visualize' section not found in chart metadata for chart ID '{chart_id}'.")
-
-        return visualize_config
-
-    except Exception as e:
-        raise RuntimeError(f"Failed to retrieve 'visualize' config for chart '{chart_id}': {e}")
-
-def get_responsive_embed_code(dw, chart_id: str) -> str | None:
-    """
-    Fetch the responsive iframe embed code for a published Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The public or internal ID of the Datawrapper chart.
-
-    Returns:
-        str | None: The responsive embed code if available, or None if not found or an error occurred.
-    """
-    try:
-        chart_info = dw.get_chart(chart_id)
-        embed_codes = chart_info.get("metadata", {}).get("publish", {}).get("embed-codes", {})
-        script_embed = embed_codes.get("embed-method-web-component", None)
-
-        if script_embed:
-            return script_embed
-        else:
-            print("❌ Script embed code not found. Make sure the chart is published.")
-            return None
-
-    except Exception as e:
-        print(f"❌ Error retrieving embed code: {e}")
-        return None
-
 def main():
     """
     Main execution pipeline for generating and publishing a Datawrapper chart.
     Streamlined error handling using helper functions.
+
+    Returns:
+        bool: True if the chart was updated and published, False if an error occurred.
     """
     try:
         # === Setup paths ===
@@ -285,7 +162,7 @@ def main():
 
         # === Load config and initialize ===
         api_token = load_api_token()
-        config = load_config(CONFIG_PATH)
+        config = load_chart_config(CONFIG_PATH)
         dw = init_datawrapper(api_token)
 
         # === Load and process data ===
@@ -293,28 +170,31 @@ def main():
         if df.empty:
             raise ValueError("Processed DataFrame is empty. Check the source Excel data.")
 
-        # === Optional: Check chart exists ===
+        # === Check chart exists (fetched once, reused below) ===
         chart_metadata = dw.get_chart(chart_id=CHART_ID)
 
         # === Print chart metadata, visualize part ===
         try:
-            visualize_config = get_chart_visualize_config(dw, CHART_ID)
+            visualize_config = get_chart_visualize_config(chart_metadata, CHART_ID)
             print(json.dumps(visualize_config, indent=2))
         except Exception as e:
             print(e)
 
         # === Update chart ===
-        update_datawrapper_chart(dw, chart_id=CHART_ID, data=df, config=config)
+        published_chart = update_and_publish_chart(dw, chart_id=CHART_ID, data=df, config=config, default_title="Datawrapper Table")
 
         # === Embed code ===
-        embed_html = get_responsive_embed_code(dw, CHART_ID)
+        embed_html = get_responsive_embed_code(dw, CHART_ID, published_chart)
         if embed_html:
             print(f"\n📎 Responsive Embed Code:\n{embed_html}")
         else:
             print("⚠️ Embed code not available (chart may not be published yet).")
 
+        return True
+
     except Exception as e:
         print(f"❌ An error occurred in main(): {e}")
+        return False
 
 
 if __name__ == "__main__":
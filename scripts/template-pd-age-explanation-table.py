@@ -13,8 +13,10 @@ The script performs the following steps:
 6. Publishes the chart and retrieves the responsive embed code.
 
 🧩 Key Components:
-- Data loading and processing with pandas.
-- Datawrapper API interaction for updating chart data, metadata, and descriptions.
+- Data loading and processing with pandas, via the shared helpers in `_template_data.py` (Excel parsing
+  via `python-calamine` when installed, else `openpyxl`; Arrow-backed string columns when `pyarrow` is installed).
+- Datawrapper API interaction for updating chart data, metadata, and descriptions, via the shared helpers
+  in `_datawrapper_chart.py`.
 - Configuration handling via JSON.
 - Secure API token management via a `.env` file.
 
@@ -37,12 +39,13 @@ project-root/
 - Released into the public domain (CC0-style). Free to reuse, adapt, and distribute.
 """
 
-import os
-from dotenv import load_dotenv
 from pathlib import Path
 import json
-from typing import Dict
-from datawrapper import Datawrapper
+from _template_data import read_template_sheet, format_template_links
+from _datawrapper_chart import (
+    load_chart_config, load_api_token, init_datawrapper, update_and_publish_chart, get_chart_visualize_config,
+    get_responsive_embed_code
+)
 import pandas as pd
 
 def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
@@ -75,9 +78,6 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
         Other exceptions are caught and logged, and an empty DataFrame is returned.
     """
     try:
-        # Load the Excel sheet
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
         # Define required columns
         required_columns = [
             'Template',
@@ -90,32 +90,32 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
             'Remarks'
         ]
 
-        # Check for missing columns
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required column(s): {', '.join(missing_cols)}")
-
-        # Filter for specific NoCopyrightReason
-        filtered_df = df[df['NoCopyrightReason'] == 'Copyrights expired because of age'].copy()
-
-        # Format 'Template' column as HTML links
-        filtered_df['Template'] = filtered_df.apply(
-            lambda row: (
-                f'<a href="{row["TemplateURL"]}" style="color:#b1bfc3;" target="_blank" rel="nofollow noopener">{row["Template"].strip("{}")}</a>'
-                if pd.notnull(row["TemplateURL"]) and row["TemplateURL"] != "" else row["Template"]
-            ),
-            axis=1
+        # Load only the required columns of the Excel sheet (raises ValueError on missing columns)
+        df = read_template_sheet(
+            excel_path,
+            sheet_name,
+            required_columns,
+            string_columns=('Template', 'TemplateURL', 'NoCopyrightReason')
         )
 
-        # Final column order selection
-        final_df = filtered_df[[
+        # Output columns, in their final order
+        output_columns = [
             'Template',
             'Number of times this template is used',
             'Years after death of author',
             'Years after first publication',
             'Years after creation',
             'Remarks'
-        ]]
+        ]
+
+        # Filter for specific NoCopyrightReason, selecting rows and the columns used below in one step
+        mask = df['NoCopyrightReason'] == 'Copyrights expired because of age'
+        filtered_df = df.loc[mask, output_columns + ['TemplateURL']]
+
+        # Final column order selection, with 'Template' formatted as HTML links
+        final_df = filtered_df[output_columns].assign(
+            Template=format_template_links(filtered_df['Template'], filtered_df['TemplateURL'])
+        )
 
         return final_df
 
@@ -128,140 +128,13 @@ def load_and_process_data(excel_path: str, sheet_name: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
-def update_datawrapper_chart(
-    dw: Datawrapper,
-    chart_id: str,
-    data: pd.DataFrame,
-    config: Dict
-) -> None:
-    """
-    Uploads data to a Datawrapper chart, updates its metadata and description, and publishes it.
-
-    This function:
-    - Uploads the provided pandas DataFrame directly into the specified Datawrapper chart.
-    - Updates chart metadata such as visualization options, annotations, and publishing settings using the provided config.
-    - Updates the chart's textual description (intro, byline, source info, aria description).
-    - Publishes the updated chart.
-    - Prints a success message upon successful publishing.
-
-    Parameters:
-        dw (Datawrapper): An authenticated Datawrapper API client instance.
-        chart_id (str): The ID of the chart to update and publish.
-        data (pd.DataFrame): The data to upload into the chart (must match chart structure).
-        config (dict): Chart configuration containing keys like 'title', 'visualize',
-                       'annotate', 'publish', and 'description'.
-
-    Raises:
-        RuntimeError: If any of the steps (data upload, chart update, description update, or publish) fail.
-    """
-    try:
-        # Upload data
-        dw.add_data(chart_id=chart_id, data=data)
-
-        # Update chart metadata
-        title = config.get("title", "Datawrapper Table")
-        dw.update_chart(
-            chart_id=chart_id,
-            title=title,
-            metadata={
-                "visualize": config.get("visualize", {}),
-                "annotate": config.get("annotate", {}),
-                "publish": config.get("publish", {})
-            }
-        )
-
-        # Update chart description
-        desc = config.get("description", {})
-        dw.update_description(
-            chart_id=chart_id,
-            intro=desc.get("intro", ""),
-            byline=desc.get("byline", ""),
-            source_name=desc.get("source-name", ""),
-            source_url=desc.get("source-url", ""),
-            aria_description=desc.get("aria-description", "")
-        )
-
-        # Publish the chart
-        dw.publish_chart(chart_id=chart_id)
-        print(f"✅ Chart '{title}' updated and published successfully.")
-
-    except Exception as e:
-        raise RuntimeError(f"❌ Error while updating and publishing chart '{chart_id}': {e}")
-
-
-def load_api_token() -> str:
-    """Load the Datawrapper API token from .env."""
-    load_dotenv()
-    token = os.getenv("DW_API_TOKEN")
-    if not token:
-        raise ValueError("DW_API_TOKEN not found in environment variables.")
-    return token
-
-def load_config(config_path: Path) -> dict:
-    """Load chart configuration from JSON file."""
-    with open(config_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def init_datawrapper(api_token: str) -> Datawrapper:
-    """Initialize the Datawrapper API client."""
-    return Datawrapper(access_token=api_token)
-
-def get_chart_visualize_config(dw: Datawrapper, chart_id: str) -> dict:
-    """
-    Fetch the 'visualize' configuration section of a Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The ID of the chart whose configuration you want to fetch.
-
-    Returns:
-        dict: The 'visualize' configuration section of the chart metadata.
-
-    Raises:
-        RuntimeError: If the chart metadata could not be retrieved or if 'visualize' section is missing.
-    """
-    try:
-        chart_metadata = dw.get_chart(chart_id=chart_id)
-        visualize_config = chart_metadata.get("metadata", {}).get("visualize", {})
-
-        if not visualize_config:
-            raise RuntimeError(f"'visualize' section not found in chart metadata for chart ID '{chart_id}'.")
-
-        return visualize_config
-
-    except Exception as e:
-        raise RuntimeError(f"Failed to retrieve 'visualize' config for chart '{chart_id}': {e}")
-
-def get_responsive_embed_code(dw, chart_id: str) -> str | None:
-    """
-    Fetch the responsive iframe embed code for a published Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The public or internal ID of the Datawrapper chart.
-
-    Returns:
-        str | None: The responsive embed code if available, or None if not found or an error occurred.
-    """
-    try:
-        chart_info = dw.get_chart(chart_id)
-        embed_codes = chart_info.get("metadata", {}).get("publish", {}).get("embed-codes", {})
-        script_embed = embed_codes.get("embed-method-web-component", None)
-
-        if script_embed:
-            return script_embed
-        else:
-            print("❌ Script embed code not found. Make sure the chart is published.")
-            return None
-
-    except Exception as e:
-        print(f"❌ Error retrieving embed code: {e}")
-        return None
-
 def main():
     """
     Main execution pipeline for generating and publishing a Datawrapper chart.
     Streamlined error handling using helper functions.
+
+    Returns:
+        bool: True if the chart was updated and published, False if an error occurred.
     """
     try:
         # === Setup paths ===
@@ -275,7 +148,7 @@ def main():
 
         # === Load config and initialize ===
         api_token = load_api_token()
-        config = load_config(CONFIG_PATH)
+        config = load_chart_config(CONFIG_PATH)
         dw = init_datawrapper(api_token)
 
         # === Load and process data ===
@@ -283,28 +156,31 @@ def main():
         if df.empty:
             raise ValueError("Processed DataFrame is empty. Check the source Excel data.")
 
-        # === Optional: Check chart exists ===
+        # === Check chart exists (fetched once, reused below) ===
         chart_metadata = dw.get_chart(chart_id=CHART_ID)
 
         # === Print chart metadata, visualize part ===
         try:
-            visualize_config = get_chart_visualize_config(dw, CHART_ID)
+            visualize_config = get_chart_visualize_config(chart_metadata, CHART_ID)
             print(json.dumps(visualize_config, indent=2))
         except Exception as e:
             print(e)
 
         # === Update chart ===
-        update_datawrapper_chart(dw, chart_id=CHART_ID, data=df, config=config)
+        published_chart = update_and_publish_chart(dw, chart_id=CHART_ID, data=df, config=config, default_title="Datawrapper Table")
 
         # === Embed code ===
-        embed_html = get_responsive_embed_code(dw, CHART_ID)
+        embed_html = get_responsive_embed_code(dw, CHART_ID, published_chart)
         if embed_html:
             print(f"\n📎 Responsive Embed Code:\n{embed_html}")
         else:
             print("⚠️ Embed code not available (chart may not be published yet).")
 
+        return True
+
     except Exception as e:
         print(f"❌ An error occurred in main(): {e}")
+        return False
 
 
 if __name__ == "__main__":
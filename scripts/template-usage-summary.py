@@ -29,10 +29,14 @@ project-root/
 Modules Used:
 -------------
 - `pandas` for data manipulation
+- `_template_data.py` (same folder) for reading the Excel sheet (cached as Parquet between runs) and formatting template links
+- `_datawrapper_chart.py` (same folder) for updating and publishing the chart
+- `python-calamine` (optional) for faster Excel parsing; falls back to `openpyxl`
+- `pyarrow` (optional) for Arrow-backed string columns, the Parquet cache and fast CSV export
 - `pathlib` for cross-platform path handling
 - `dotenv` to load secure API keys
 - `datawrapper` for API interaction with https://app.datawrapper.de
-- `json` for configuration injection
+- `json` for configuration injection (the config is parsed by `_datawrapper_chart.py`, with `orjson` when installed)
 
 Chart Output:
 -------------
@@ -52,13 +56,22 @@ Olaf Janssen, Wikimedia-coördinator @KB, National Library of the Netherlands
 🔗 User-Agent: OlafJanssenBot/1.0
 """
 
-import os
-from datawrapper import Datawrapper #https://datawrapper.readthedocs.io/en/latest/user-guide/api.html
-from dotenv import load_dotenv
 import pandas as pd
 import json
 from pathlib import Path
 from typing import Tuple
+from _template_data import read_template_sheet, format_template_links, STRING_DTYPE
+from _datawrapper_chart import (
+    load_chart_config, load_api_token, init_datawrapper, update_and_publish_chart, get_chart_visualize_config,
+    get_responsive_embed_code
+)
+
+# Use Arrow's CSV writer when pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa_csv = None
 
 def count_template_usages(
     excel_path: str,
@@ -105,50 +118,51 @@ def count_template_usages(
     """
 
     try:
-        # Load the data
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-
-        # Check required columns
-        required_cols = {"Template", "TemplateURL", "NoCopyrightReason", "FileMid", "FileURL"}
-        missing_cols = required_cols - set(df.columns)
-        if missing_cols:
-            raise ValueError(f"Missing required column(s): {', '.join(missing_cols)}")
+        # Load only the required columns (from the Parquet cache when the Excel file is unchanged),
+        # and read the text columns directly as strings (no type inference)
+        required_cols = ["Template", "TemplateURL", "NoCopyrightReason", "FileMid", "FileURL"]
+        df = read_template_sheet(excel_path, sheet_name, required_cols, string_columns=tuple(required_cols))
 
         # Clean string-type columns
-        df["Template"] = df["Template"].astype(str).str.strip()
-        df["TemplateURL"] = df["TemplateURL"].astype(str).str.strip()
-        df["NoCopyrightReason"] = df["NoCopyrightReason"].astype(str).str.strip()
-
-        # Calculate the number of files using each template
-        usage_counts = df["Template"].value_counts().reset_index()
-        usage_counts.columns = ["Template", "Number of times this template is used"]
-
-        # Merge counts with TemplateURL and NoCopyrightReason (remove duplicates first)
-        summary = usage_counts.merge(
-            df[["Template", "TemplateURL", "NoCopyrightReason"]].drop_duplicates(subset=["Template"]),
-            on="Template",
-            how="left"
-        )
-
-        # Format Template as an HTML link for Datawrapper
-        summary["Template"] = summary.apply(
-            lambda row: (
-                f'<a href="{row["TemplateURL"]}" style="color:#b1bfc3;" target="_blank" rel="nofollow noopener">{row["Template"].strip("{}")}</a>'
-                if pd.notnull(row["TemplateURL"]) and row["TemplateURL"] != "" else row["Template"]
-            ),
-            axis=1
-        )
+        df["Template"] = df["Template"].str.strip()
+        df["TemplateURL"] = df["TemplateURL"].str.strip()
+        df["NoCopyrightReason"] = df["NoCopyrightReason"].str.strip()
+
+        # Many files share a template (and reason): as categoricals, the groupby and the sort
+        # below work on integer codes instead of strings
+        df["Template"] = df["Template"].astype("category")
+        df["NoCopyrightReason"] = df["NoCopyrightReason"].astype("category")
+
+        # Count the number of files using each template, and take the TemplateURL and
+        # NoCopyrightReason of its first occurrence, in a single groupby pass
+        summary = df.groupby("Template", sort=False, dropna=False, observed=True).agg(
+            **{
+                "Number of times this template is used": ("Template", "size"),
+                "TemplateURL": ("TemplateURL", "first"),
+                "NoCopyrightReason": ("NoCopyrightReason", "first")
+            }
+        ).reset_index()
+        summary["Template"] = summary["Template"].astype(STRING_DTYPE)
 
-        # Sort summary: first by NoCopyrightReason (A–Z), then by Number of files (desc)
+        # Sort summary: first by NoCopyrightReason (A–Z), then by Number of files (desc);
+        # the sort only moves the short template names, the HTML links are built afterwards
         summary = summary.sort_values(
             by=["NoCopyrightReason", "Number of times this template is used"],
             ascending=[True, False]
         )
 
+        # Format Template as an HTML link for Datawrapper
+        summary["Template"] = format_template_links(summary["Template"], summary["TemplateURL"])
+
         # Export CSV if requested
         if output_csv:
             try:
-                summary.to_csv(output_csv, index=False, encoding="utf-8", sep=";")
+                if pa_csv is not None:
+                    # Multithreaded C++ CSV writer
+                    table = pa.Table.from_pandas(summary, preserve_index=False)
+                    pa_csv.write_csv(table, str(output_csv), write_options=pa_csv.WriteOptions(delimiter=";"))
+                else:
+                    summary.to_csv(output_csv, index=False, encoding="utf-8", sep=";")
                 print(f"✅ Template usage summary saved to: {output_csv}")
             except Exception as e:
                 print(f"⚠️ Failed to save CSV: {e}")
@@ -210,13 +224,16 @@ def generate_template_stats(df: pd.DataFrame, summary: pd.DataFrame) -> dict:
         if "Number of times this template is used" not in summary.columns:
             raise ValueError("Summary data is missing 'Number of times this template is used' column.")
 
-        # Use the provided summary table for the counts
+        # Use the provided summary table for the counts; the distinct counts are hash-based
+        # (Template is categorical, FileURL and FileMid are Arrow-backed strings)
         total_template_usages = summary["Number of times this template is used"].sum()
         unique_templates_used = df["Template"].nunique()
         total_files_with_templates = df["FileURL"].nunique()
         total_unique_files = df["FileMid"].nunique()
-        most_used_template = summary.iloc[0]["Template"]
-        most_used_template_count = summary.iloc[0]["Number of times this template is used"]
+        # The summary is sorted by reason first, so look up the overall most used template (single pass, no sort)
+        most_used = summary["Number of times this template is used"].idxmax()
+        most_used_template = summary.at[most_used, "Template"]
+        most_used_template_count = summary.at[most_used, "Number of times this template is used"]
 
         stats = {
             "total_template_usages": total_template_usages,
@@ -242,153 +259,34 @@ def generate_template_stats(df: pd.DataFrame, summary: pd.DataFrame) -> dict:
         return {}
 
 
-def update_and_publish_chart(
-    dw: Datawrapper,
-    chart_id: str,
-    data: pd.DataFrame,
-    config: dict
-) -> None:
-    """
-    Uploads data, updates metadata and description, and publishes the chart.
-
-    This function no longer depends on reading a CSV from disk.
-    Instead, it expects a pandas DataFrame directly as input.
-
-    Parameters:
-        dw (Datawrapper): Datawrapper API instance.
-        chart_id (str): ID of the chart to update.
-        data (pd.DataFrame): DataFrame containing the chart data.
-        config (dict): Chart configuration loaded from a JSON file.
-
-    Raises:
-        Exception: Any errors that occur during the update or publishing process.
-    """
-    try:
-        # Upload data directly from DataFrame
-        dw.add_data(chart_id=chart_id, data=data)
-
-        # Extract chart title
-        title = config.get("title", "Untitled Datawrapper Chart")
-
-        # Apply chart metadata
-        dw.update_chart(
-            chart_id=chart_id,
-            title=title,
-            metadata={
-                "visualize": config.get("visualize", {}),
-                "annotate": config.get("annotate", {}),
-                "publish": config.get("publish", {})
-            }
-        )
-
-        # Apply textual description (description block)
-        desc = config.get("description", {})
-        dw.update_description(
-            chart_id=chart_id,
-            intro=desc.get("intro", ""),
-            byline=desc.get("byline", ""),
-            source_name=desc.get("source-name", ""),
-            source_url=desc.get("source-url", ""),
-            aria_description=desc.get("aria-description", "")
-        )
-
-        # Publish chart
-        dw.publish_chart(chart_id=chart_id)
-        print(f"🚀 Chart '{title}' updated and published successfully.")
-
-    except Exception as e:
-        print(f"❌ Error during chart update: {e}")
-
-
-def load_config(path: Path) -> dict:
-    """Load and return the chart configuration from a JSON file."""
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        raise RuntimeError(f"Failed to load chart config from {path}: {e}")
-
+def format_with_stats(value, stats: dict):
+    """Fill the statistics placeholders of a config string; strings without placeholders and other values are returned as is."""
+    return value.format_map(stats) if isinstance(value, str) and "{" in value else value
 
 def apply_stats_to_config(config: dict, stats: dict) -> None:
     """Format and insert statistics into chart config placeholders."""
     for section in ["description", "annotate"]:
         if section in config:
-            config[section] = {
-                k: (v.format(**stats) if isinstance(v, str) else v)
-                for k, v in config[section].items()
-            }
+            config[section] = {k: format_with_stats(v, stats) for k, v in config[section].items()}
 
     # Handle embedded text annotations
     if "visualize" in config and "text-annotations" in config["visualize"]:
         config["visualize"]["text-annotations"] = [
-            {k: (v.format(**stats) if isinstance(v, str) else v) for k, v in annotation.items()}
+            {k: format_with_stats(v, stats) for k, v in annotation.items()}
             for annotation in config["visualize"]["text-annotations"]
         ]
 
-def get_chart_visualize_config(dw: Datawrapper, chart_id: str) -> dict:
-    """
-    Fetch the 'visualize' metadata configuration section of a Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The ID of the chart whose configuration you want to fetch.
-
-    Returns:
-        dict: The 'visualize' configuration section of the chart metadata.
-
-    Raises:
-        RuntimeError: If the chart metadata could not be retrieved or if 'visualize' section is missing.
-    """
-    try:
-        chart_metadata = dw.get_chart(chart_id=chart_id)
-        visualize_config = chart_metadata.get("metadata", {}).get("visualize", {})
-
-        if not visualize_config:
-            raise RuntimeError(f"'visualize' section not found in chart metadata for chart ID '{chart_id}'.")
-
-        return visualize_config
-
-    except Exception as e:
-        raise RuntimeError(f"Failed to retrieve 'visualize' config for chart '{chart_id}': {e}")
-
-def get_responsive_embed_code(dw, chart_id: str) -> str | None:
-    """
-    Fetch the responsive iframe embed code for a published Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The public or internal ID of the Datawrapper chart.
-
-    Returns:
-        str | None: The responsive embed code if available, or None if not found or an error occurred.
-    """
-    try:
-        chart_info = dw.get_chart(chart_id)
-        embed_codes = chart_info.get("metadata", {}).get("publish", {}).get("embed-codes", {})
-        script_embed = embed_codes.get("embed-method-web-component", None)
-
-        if script_embed:
-            return script_embed
-        else:
-            print("❌ Script embed code not found. Make sure the chart is published.")
-            return None
-
-    except Exception as e:
-        print(f"❌ Error retrieving embed code: {e}")
-        return None
-
-
 def main():
     """
     Main pipeline to process Excel data, generate summary stats,
     update a Datawrapper chart, and print the responsive embed code.
+
+    Returns:
+        bool: True if the chart was updated and published, False if an error occurred.
     """
     try:
-        # Load environment variables
-        load_dotenv()
-        DW_API_TOKEN = os.getenv("DW_API_TOKEN")
-        if not DW_API_TOKEN:
-            raise ValueError("DW_API_TOKEN not found in .env file!")
+        # Load the API token from .env
+        api_token = load_api_token()
 
         # Define paths
         ROOT_DIR = Path(__file__).resolve().parent.parent
@@ -401,14 +299,15 @@ def main():
         CHART_ID = "UewJt"
 
         # Load chart config
-        config = load_config(CONFIG_PATH)
+        config = load_chart_config(CONFIG_PATH)
 
         # Authenticate Datawrapper client
-        dw = Datawrapper(access_token=DW_API_TOKEN)
+        dw = init_datawrapper(api_token)
 
         # === Print existing chart metadata, visualize part ===
         try:
-            visualize_config = get_chart_visualize_config(dw, CHART_ID)
+            chart_metadata = dw.get_chart(chart_id=CHART_ID)
+            visualize_config = get_chart_visualize_config(chart_metadata, CHART_ID)
             print(json.dumps(visualize_config, indent=2))
         except Exception as e:
             print(e)
@@ -428,7 +327,7 @@ def main():
         apply_stats_to_config(config, stats)
 
         # Update and publish chart
-        update_and_publish_chart(
+        published_chart = update_and_publish_chart(
             dw=dw,
             chart_id=CHART_ID,
             data=summary_df,
@@ -436,14 +335,17 @@ def main():
         )
 
         # Print responsive embed code
-        embed_html = get_responsive_embed_code(dw, CHART_ID)
+        embed_html = get_responsive_embed_code(dw, CHART_ID, published_chart)
         if embed_html:
             print(f"\n📎 Responsive Embed Code:\n{embed_html}")
         else:
             print("⚠️ Chart published, but no embed code was returned.")
 
+        return True
+
     except Exception as e:
         print(f"❌ An error occurred during main(): {e}")
+        return False
 
 
 if __name__ == "__main__":
@@ -20,9 +20,14 @@ The script summarizes the number of files grouped by 'NoCopyrightReason' and use
 
 🧩 Technologies & Libraries Used:
 - `pandas`: For data handling and transformation.
+- `_template_data.py` (same folder): Reads the Excel sheet, cached as Parquet between runs.
+- `_datawrapper_chart.py` (same folder): Loads the chart configuration, updates and publishes the chart.
+- `python-calamine` (optional): For faster Excel parsing; falls back to `openpyxl`.
+- `pyarrow` (optional): For Arrow-backed string columns and the Parquet cache.
 - `datawrapper`: Official API wrapper for interacting with Datawrapper.
 - `dotenv`: For securely loading the API key from a `.env` file.
 - `pathlib` & `json`: For modern file handling and configuration loading.
+- `orjson` (optional): For faster parsing of the chart configuration (in `_datawrapper_chart.py`).
 
 📁 Project Structure:
 project-root/
@@ -46,12 +51,14 @@ project-root/
 - This script is released into the public domain (CC0-style). Free to use, modify, and distribute.
 """
 
-from datawrapper import Datawrapper #https://datawrapper.readthedocs.io/en/latest/user-guide/api.html
-from dotenv import load_dotenv
-import os
 import json
 from pathlib import Path
 import pandas as pd
+from _template_data import read_excel_cached
+from _datawrapper_chart import (
+    load_chart_config, load_api_token, init_datawrapper, update_and_publish_chart, get_chart_visualize_config,
+    get_responsive_embed_code
+)
 
 def count_nocopyrightreason_usage(
     excel_path: str,
@@ -83,7 +90,9 @@ def count_nocopyrightreason_usage(
     """
 
     try:
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
+        # Load only the columns used for the summary (from the Parquet cache when the Excel file is unchanged),
+        # with the reasons read directly as (Arrow-backed) strings
+        df = read_excel_cached(excel_path, sheet_name, {"NoCopyrightReason", "FileMid"}, string_columns=("NoCopyrightReason",))
 
         if "NoCopyrightReason" not in df.columns or "FileMid" not in df.columns:
             raise ValueError("Missing required columns 'NoCopyrightReason' and/or 'FileMid'.")
@@ -101,140 +110,16 @@ def count_nocopyrightreason_usage(
         print(f"❌ Error in count_nocopyrightreason_usage(): {e}")
         return pd.DataFrame()
 
-def update_and_publish_chart(
-    dw: Datawrapper,
-    chart_id: str,
-    data: pd.DataFrame,
-    config: dict
-) -> None:
-    """
-    Uploads data, updates metadata and description, and publishes the chart.
-
-    This function no longer depends on reading a CSV from disk.
-    Instead, it expects a pandas DataFrame directly as input.
-
-    Parameters:
-        dw (Datawrapper): Datawrapper API instance.
-        chart_id (str): ID of the chart to update.
-        data (pd.DataFrame): DataFrame containing the chart data.
-        config (dict): Chart configuration loaded from a JSON file.
-
-    Raises:
-        Exception: Any errors that occur during the update or publishing process.
-    """
-    try:
-        # Upload data directly from DataFrame
-        dw.add_data(chart_id=chart_id, data=data)
-
-        # Extract chart title
-        title = config.get("title", "Untitled Datawrapper Chart")
-
-        # Apply chart metadata
-        dw.update_chart(
-            chart_id=chart_id,
-            title=title,
-            metadata={
-                "visualize": config.get("visualize", {}),
-                "annotate": config.get("annotate", {}),
-                "publish": config.get("publish", {})
-            }
-        )
-
-        # Apply textual description (description block)
-        desc = config.get("description", {})
-        dw.update_description(
-            chart_id=chart_id,
-            intro=desc.get("intro", ""),
-            byline=desc.get("byline", ""),
-            source_name=desc.get("source-name", ""),
-            source_url=desc.get("source-url", ""),
-            aria_description=desc.get("aria-description", "")
-        )
-
-        # Publish chart
-        dw.publish_chart(chart_id=chart_id)
-        print(f"🚀 Chart '{title}' updated and published successfully.")
-
-    except Exception as e:
-        print(f"❌ Error during chart update: {e}")
-
-
-def load_api_token() -> str:
-    """Load the API token securely from the .env file."""
-    load_dotenv()
-    token = os.getenv("DW_API_TOKEN")
-    if not token:
-        raise ValueError("DW_API_TOKEN not found in .env file!")
-    return token
-
-def load_chart_config(config_path: Path) -> dict:
-    """Load the chart configuration from the given JSON file."""
-    with open(config_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def authenticate_datawrapper(api_token: str) -> Datawrapper:
-    """Initialize the Datawrapper client."""
-    return Datawrapper(access_token=api_token)
-
-def check_chart_exists(dw: Datawrapper, chart_id: str) -> None:
-    """Check if the given chart ID exists in Datawrapper."""
-    dw.get_chart(chart_id=chart_id)  # Will raise if chart does not exist
-
-def get_chart_visualize_config(dw: Datawrapper, chart_id: str) -> dict:
-    """
-    Fetch the 'visualize' configuration section of a Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The ID of the chart whose configuration you want to fetch.
-
-    Returns:
-        dict: The 'visualize' configuration section of the chart metadata.
-
-    Raises:
-        RuntimeError: If the chart metadata could not be retrieved or if 'visualize' section is missing.
-    """
-    try:
-        chart_metadata = dw.get_chart(chart_id=chart_id)
-        visualize_config = chart_metadata.get("metadata", {}).get("visualize", {})
-
-        if not visualize_config:
-            raise RuntimeError(f"'visualize' section not found in chart metadata for chart ID '{chart_id}'.")
-
-        return visualize_config
-
-    except Exception as e:
-        raise RuntimeError(f"Failed to retrieve 'visualize' config for chart '{chart_id}': {e}")
-
-def get_responsive_embed_code(dw, chart_id: str) -> str | None:
-    """
-    Fetch the responsive iframe embed code for a published Datawrapper chart.
-
-    Parameters:
-        dw (Datawrapper): An instance of the Datawrapper API client.
-        chart_id (str): The public or internal ID of the Datawrapper chart.
-
-    Returns:
-        str | None: The responsive embed code if available, or None if not found or an error occurred.
-    """
-    try:
-        chart_info = dw.get_chart(chart_id)
-        embed_codes = chart_info.get("metadata", {}).get("publish", {}).get("embed-codes", {})
-        script_embed = embed_codes.get("embed-method-web-component", None)
-
-        if script_embed:
-            return script_embed
-        else:
-            print("❌ Script embed code not found. Make sure the chart is published.")
-            return None
-
-    except Exception as e:
-        print(f"❌ Error retrieving embed code: {e}")
-        return None
+def check_chart_exists(dw, chart_id: str) -> dict:
+    """Check if the given chart ID exists in Datawrapper, and return its chart information."""
+    return dw.get_chart(chart_id=chart_id)  # Will raise if chart does not exist
 
 def main():
     """
     Main execution for generating and publishing the donut chart (template groups summary).
+
+    Returns:
+        bool: True if the chart was updated and published, False if an error occurred.
     """
     try:
         # === Setup paths ===
@@ -252,12 +137,12 @@ def main():
         chart_title = config.get("title", "Untitled Datawrapper Chart")
 
         # === Init Datawrapper and validate chart ===
-        dw = authenticate_datawrapper(api_token)
-        check_chart_exists(dw, chart_id=CHART_ID)
+        dw = init_datawrapper(api_token)
+        chart_metadata = check_chart_exists(dw, chart_id=CHART_ID)  # Fetched once, reused below
 
         # === Print chart metadata, visualize part ===
         try:
-            visualize_config = get_chart_visualize_config(dw, CHART_ID)
+            visualize_config = get_chart_visualize_config(chart_metadata, CHART_ID)
             print(json.dumps(visualize_config, indent=2))
         except Exception as e:
             print(e)
@@ -268,7 +153,7 @@ def main():
             raise RuntimeError("Summary DataFrame is empty. Chart will not be updated.")
 
         # === Update and publish chart ===
-        update_and_publish_chart(
+        published_chart = update_and_publish_chart(
             dw=dw,
             chart_id=CHART_ID,
             data=reason_summary_df,
@@ -276,14 +161,17 @@ def main():
         )
 
         # === Retrieve embed code ===
-        embed_html = get_responsive_embed_code(dw, CHART_ID)
+        embed_html = get_responsive_embed_code(dw, CHART_ID, published_chart)
         if embed_html:
             print(f"\n📎 Responsive Embed Code:\n{embed_html}")
         else:
             print("⚠️ Chart published, but no embed code was returned.")
 
+        return True
+
     except Exception as e:
         print(f"❌ An error occurred during main(): {e}")
+        return False
 
 if __name__ == "__main__":
     main()
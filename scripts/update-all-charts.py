@@ -0,0 +1,77 @@
+"""
+📊 Update all Datawrapper charts in one run
+
+This script runs the `main()` pipelines of all Datawrapper chart scripts in this folder
+concurrently, so their chart updates (data upload, metadata, publishing) overlap on the
+network instead of running one after another. The charts share no state: each script
+updates its own chart ID from its own config file.
+
+⚙️ **Workflow**:
+1. Imports each chart script as a module (without running it).
+2. Runs the `main()` functions in a thread pool, one thread per chart.
+3. Reports which chart updates succeeded and which failed (each `main()` returns True on success).
+
+Each script keeps its own error handling; a failure in one chart does not stop the others.
+Console output of the charts may interleave.
+
+🔒 **Requirements**:
+- Same as the individual chart scripts (`.env` with `DW_API_TOKEN`, `pandas`, `python-dotenv`, `datawrapper`).
+
+💼 License:
+- Released into the public domain (CC0-style). Free to reuse, adapt, and distribute.
+"""
+
+import importlib.util
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Chart scripts whose main() updates and publishes one Datawrapper chart
+CHART_SCRIPTS = [
+    "template-usage-summary.py",
+    "templategroups-usage_summary.py",
+    "template-explanation-table.py",
+    "template-pd-age-explanation-table.py",
+]
+
+
+def load_script(script_path: Path):
+    """Import a chart script (the file names contain hyphens) as a module, without running its main()."""
+    spec = importlib.util.spec_from_file_location(script_path.stem.replace("-", "_"), script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    """
+    Runs the main() pipelines of all chart scripts concurrently and waits for them to finish.
+
+    Returns:
+        bool: True if all charts were updated and published, False if any of them failed.
+    """
+    modules = {name: load_script(SCRIPT_DIR / name) for name in CHART_SCRIPTS}
+
+    with ThreadPoolExecutor(max_workers=len(modules)) as executor:
+        futures = {executor.submit(module.main): name for name, module in modules.items()}
+        failed = []
+        for future in as_completed(futures):
+            try:
+                succeeded = future.result()
+            except Exception as e:
+                print(f"❌ {futures[future]} failed: {e}")
+                succeeded = False
+            if succeeded:
+                print(f"🏁 Finished: {futures[future]}")
+            else:
+                failed.append(futures[future])
+
+    if failed:
+        print(f"❌ Failed chart update(s): {', '.join(sorted(failed))}")
+    return not failed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)